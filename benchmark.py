@@ -0,0 +1,137 @@
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from urllib.parse import quote
+
+import requests
+
+from main import Auth, Bot, setup_logging
+
+PHASE_LABELS = ["Login"] + [label for _, _, label, _ in Auth.PHASES]
+
+def synthetic_query(user_id):
+    """Telegram-style init data for a fake account."""
+    user = json.dumps({"id": user_id, "first_name": f"Bench{user_id}", "username": f"bench{user_id}"}, separators=(",", ":"))
+    return f"query_id=AAB{user_id}&user={quote(user)}&auth_date={int(time.time())}&hash={user_id:064x}"
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(fraction * len(ordered))) - 1))
+    return ordered[index]
+
+def start_mock(args):
+    """Run mock_server.py in its own process so it does not share the client's GIL."""
+    command = [
+        sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "mock_server.py"),
+        "--port", "0", "--latency", str(args.latency), "--jitter", str(args.jitter),
+        "--error-rate", str(args.error_rate), "--rate-429", str(args.rate_429),
+    ]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline().strip()
+    return process, line.rsplit(" ", 1)[-1]
+
+def bench(size, first_id, base_url, args, workdir):
+    """Run one full pass over `size` synthetic accounts and collect the numbers."""
+    query_file = os.path.join(workdir, f"query-{size}.txt")
+    user_ids = list(range(first_id, first_id + size))
+    with open(query_file, "w") as file:
+        file.write("\n".join(synthetic_query(user_id) for user_id in user_ids))
+
+    config = {
+        "auto_farming": True, "auto_spin": True, "auto_task": True, "auto_campaign": True,
+        "auto_achievements": True, "auto_reff": True,
+        "delay_change_account": 0, "delay_iteration": 600,
+        "max_concurrency": args.concurrency,
+        "rate_limit": args.rate_limit, "rate_limit_max": args.rate_limit, "account_interval": 0,
+        "base_url": base_url,
+        "log_level": "INFO" if args.verbose else "WARNING",
+        "token_cache": os.path.join(workdir, f"tokens-{size}.json"),
+        "state_db": os.path.join(workdir, f"state-{size}.db"),
+    }
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        bot = Bot(query_file, config)
+    setup_logging(config)
+    asyncio.run(bot.run_cycle())
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    stats = requests.get(f"{base_url}/__stats", timeout=30).json()["requests"]
+    total_requests = sum(stats.get(str(user_id), 0) for user_id in user_ids)
+    phases = {}
+    for label in PHASE_LABELS:
+        durations = [auth.timings[label] for auth in bot.accounts.values() if label in auth.timings]
+        phases[label] = {"p50": percentile(durations, 0.50), "p99": percentile(durations, 0.99)}
+
+    return {
+        "accounts": size,
+        "seconds": elapsed,
+        "accounts_per_hour": size / elapsed * 3600 if elapsed else 0.0,
+        "requests_per_account": total_requests / size,
+        "peak_traced_mb": peak / 1024 / 1024,
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "phases": phases,
+    }
+
+def report(result):
+    print(f"\n== {result['accounts']} accounts ==")
+    print(f"Wall time          : {result['seconds']:.2f} s")
+    print(f"Accounts / hour    : {result['accounts_per_hour']:.0f}")
+    print(f"Requests / account : {result['requests_per_account']:.1f}")
+    print(f"Peak traced memory : {result['peak_traced_mb']:.1f} MiB (max RSS {result['max_rss_mb']:.1f} MiB)")
+    print(f"{'Phase':<14}{'p50 (s)':>10}{'p99 (s)':>10}")
+    for label, numbers in result["phases"].items():
+        print(f"{label:<14}{numbers['p50']:>10.3f}{numbers['p99']:>10.3f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput benchmark of main.py against the local mock API")
+    parser.add_argument("--accounts", type=int, nargs="+", default=[10, 100, 1000], help="account counts to run, e.g. 10 100 1000 10000")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--rate-limit", type=float, default=1000, help="client-side requests per second")
+    parser.add_argument("--url", help="use an already running mock instead of starting one")
+    parser.add_argument("--latency", type=float, default=20, help="mock latency per request in ms")
+    parser.add_argument("--jitter", type=float, default=5)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--rate-429", type=float, default=0)
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--verbose", action="store_true", help="print the bot log")
+    args = parser.parse_args()
+
+    process = None
+    base_url = args.url
+    if not base_url:
+        process, base_url = start_mock(args)
+    try:
+        results = []
+        first_id = 1
+        with tempfile.TemporaryDirectory() as workdir:
+            for size in args.accounts:
+                result = bench(size, first_id, base_url, args, workdir)
+                first_id += size
+                report(result)
+                results.append(result)
+        if args.json:
+            with open(args.json, "w") as file:
+                json.dump(results, file, indent=2)
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+
+if __name__ == "__main__":
+    main()
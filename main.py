@@ -3,6 +3,1097 @@ from datetime import datetime
 from colorama import Fore
 import requests
 import json
+import re
+import sys
+import queue
+import atexit
+import logging
+from logging.handlers import QueueHandler, QueueListener
+import os
+import base64
+import hashlib
+import io
+import cProfile
+import pstats
+import tracemalloc
+import contextlib
+import gzip
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from email.utils import parsedate_to_datetime
+import sqlite3
+import argparse
+import subprocess
+import signal
+import asyncio
+import heapq
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger("rewardshq")
+ANSI_PATTERN = re.compile(r"\x1b\[[0-9;]*m")
+
+def log(message, color=Fore.RESET, level=logging.INFO, account=None):
+    """Queue a log record; formatting and writing happen on the listener thread."""
+    logger.log(level, message, extra={"color": color, "account": account})
+
+class ConsoleFormatter(logging.Formatter):
+    """The classic colored `[time] | [account] message` line."""
+
+    def format(self, record):
+        stamp = datetime.fromtimestamp(record.created).strftime("[%Y:%m:%d:%H:%M:%S] |")
+        account = getattr(record, "account", None)
+        prefix = f"{Fore.LIGHTBLACK_EX}[{account}] " if account else ""
+        color = getattr(record, "color", Fore.RESET)
+        return Fore.LIGHTBLACK_EX + stamp + " " + prefix + color + record.getMessage() + Fore.RESET
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, without color codes."""
+
+    def format(self, record):
+        return json.dumps({
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname.lower(),
+            "account": getattr(record, "account", None),
+            "message": ANSI_PATTERN.sub("", record.getMessage()),
+        }, ensure_ascii=False)
+
+log_listener = None
+
+def setup_logging(config):
+    """Route log records through a queue to the console and, optionally, a JSON-lines file."""
+    global log_listener
+    if log_listener:
+        atexit.unregister(log_listener.stop)
+        log_listener.stop()
+    console = logging.StreamHandler(sys.stdout)
+    console.setFormatter(JsonFormatter() if config.get("log_format") == "json" else ConsoleFormatter())
+    handlers = [console]
+    if config.get("log_file"):
+        file_handler = logging.FileHandler(config["log_file"], encoding="utf-8")
+        file_handler.setFormatter(JsonFormatter())
+        handlers.append(file_handler)
+
+    log_queue = queue.SimpleQueue()
+    logger.handlers = [QueueHandler(log_queue)]
+    logger.setLevel(str(config.get("log_level", "INFO")).upper())
+    logger.propagate = False
+    log_listener = QueueListener(log_queue, *handlers, respect_handler_level=False)
+    log_listener.start()
+    atexit.register(log_listener.stop)
+
+def parse_timestamp(value):
+    """Convert an API timestamp (epoch seconds/milliseconds or ISO string) to epoch seconds."""
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return value / 1000 if value > 1e11 else float(value)
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+        except ValueError:
+            return None
+    return None
+
+def parse_duration(value):
+    """Seconds from a number or a string such as '90', '30m', '6h' or '1d'."""
+    if isinstance(value, str):
+        match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([smhd]?)\s*", value.lower())
+        if not match:
+            raise ValueError(f"invalid duration: {value!r}")
+        return float(match.group(1)) * {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400}[match.group(2)]
+    return float(value)
+
+def parse_cadences(config):
+    """Copy of config with delay_iteration and every phase_cadence, including account_overrides, parsed into seconds.
+
+    Raises ValueError naming the offending key, so a bad value stops the bot at startup.
+    """
+    def parse(section, prefix):
+        parsed = dict(section)
+        if "delay_iteration" in section:
+            try:
+                parsed["delay_iteration"] = parse_duration(section["delay_iteration"])
+            except (TypeError, ValueError):
+                raise ValueError(f"{prefix}delay_iteration: invalid duration {section['delay_iteration']!r}")
+        cadences = section.get("phase_cadence", {})
+        if not isinstance(cadences, dict):
+            raise ValueError(f"{prefix}phase_cadence must be an object")
+        phases = {phase for phase, _, _, _ in Auth.PHASES}
+        parsed["phase_cadence"] = {}
+        for phase, value in cadences.items():
+            if phase not in phases:
+                raise ValueError(f"{prefix}phase_cadence.{phase}: unknown phase, expected one of {', '.join(sorted(phases))}")
+            try:
+                parsed["phase_cadence"][phase] = parse_duration(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"{prefix}phase_cadence.{phase}: invalid duration {value!r}, use e.g. 90, '30m', '6h' or '1d'")
+        if "phase_cadence" not in section:
+            del parsed["phase_cadence"]
+        return parsed
+
+    config = parse(config, "")
+    overrides = config.get("account_overrides", {})
+    if not isinstance(overrides, dict):
+        raise ValueError("account_overrides must be an object")
+    parsed = {}
+    for user_id, section in overrides.items():
+        if not isinstance(section, dict):
+            raise ValueError(f"account_overrides.{user_id} must be an object")
+        parsed[user_id] = parse(section, f"account_overrides.{user_id}.")
+    if overrides:
+        config["account_overrides"] = parsed
+    return config
+
+def telegram_user_id(query):
+    """The Telegram user id inside a query's init data, or None when it has none."""
+    try:
+        return json.loads(parse_qs(query)["user"][0])["id"]
+    except (KeyError, IndexError, ValueError, TypeError):
+        return None
+
+def legacy_account_key(query):
+    """Account key used before keys followed the Telegram user; kept to migrate old state."""
+    return hashlib.sha256(query.encode()).hexdigest()
+
+def account_key(query):
+    """Stable identifier of an account: its Telegram user, so refreshed init data keeps the same key."""
+    user_id = telegram_user_id(query)
+    if user_id is None:
+        return legacy_account_key(query)
+    return hashlib.sha256(f"tg:{user_id}".encode()).hexdigest()
+
+def shard_of(key, count):
+    """Shard (0-based) an account key belongs to; stable across restarts and hosts."""
+    return int(key[:16], 16) % count
+
+def parse_shard(value):
+    """Parse an `i/N` shard spec (1-based) into an (i, N) tuple."""
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid shard '{value}', expected i/N such as 1/4")
+    if count < 1 or not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"invalid shard '{value}', i must be between 1 and N")
+    return index, count
+
+def shard_path(path, shard):
+    """Per-shard variant of a file name: tokens.json -> tokens.2-of-4.json."""
+    if not shard:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.{shard[0]}-of-{shard[1]}{ext}"
+
+def token_expired(token, leeway=60):
+    """Check the exp claim of a JWT access token; tokens without one are trusted until a 401."""
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        expires = json.loads(base64.urlsafe_b64decode(payload)).get("exp")
+    except (IndexError, ValueError, AttributeError):
+        return False
+    return isinstance(expires, (int, float)) and expires - leeway <= time.time()
+
+class TokenCache:
+    """Access and refresh tokens kept on disk per account, keyed by account_key.
+
+    Changes only mark the cache dirty; the file is rewritten by flush(), which the bot
+    calls every FLUSH_INTERVAL seconds and which also runs at exit.
+    """
+
+    FLUSH_INTERVAL = 30
+
+    def __init__(self, path="tokens.json"):
+        self.path = path
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.dirty = False
+        try:
+            with open(path) as file:
+                self.data = json.load(file)
+        except (FileNotFoundError, ValueError):
+            self.data = {}
+        atexit.register(self.flush)
+
+    def get(self, key):
+        with self.lock:
+            return self.data.get(key)
+
+    def set(self, key, value):
+        with self.lock:
+            self.data[key] = value
+            self.dirty = True
+
+    def delete(self, key):
+        with self.lock:
+            if self.data.pop(key, None) is not None:
+                self.dirty = True
+
+    def rename(self, keys):
+        """Move entries to new keys, given a {old: new} mapping; unknown keys are ignored."""
+        with self.lock:
+            moved = [old for old in keys if old in self.data and keys[old] not in self.data]
+            for old in moved:
+                self.data[keys[old]] = self.data.pop(old)
+            if moved:
+                self.dirty = True
+
+    def flush(self):
+        """Write the cache to disk when it changed since the last flush."""
+        with self.flush_lock:
+            with self.lock:
+                if not self.dirty:
+                    return
+                payload = json.dumps(self.data)
+                self.dirty = False
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, "w") as file:
+                file.write(payload)
+            os.replace(temp_path, self.path)
+
+class StateStore:
+    """SQLite index of items each account has already finished, plus a journal of finished phases."""
+
+    def __init__(self, path="state.db"):
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self.lock, self.db:
+            if path != ":memory:":
+                self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS items ("
+                "account TEXT NOT NULL, kind TEXT NOT NULL, item TEXT NOT NULL, updated_at REAL NOT NULL, "
+                "PRIMARY KEY (account, kind, item))"
+            )
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS checkpoints ("
+                "account TEXT NOT NULL, phase TEXT NOT NULL, finished_at REAL NOT NULL, due_at REAL NOT NULL, "
+                "PRIMARY KEY (account, phase))"
+            )
+
+    def items(self, account, kind, since=0):
+        """All finished items of one kind for an account, optionally only those marked at or after `since`."""
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT item FROM items WHERE account = ? AND kind = ? AND updated_at >= ?", (account, kind, since)
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def add(self, account, kind, item):
+        """Mark an item as finished for an account."""
+        if item is None:
+            return
+        with self.lock, self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO items (account, kind, item, updated_at) VALUES (?, ?, ?, ?)",
+                (account, kind, str(item), time.time())
+            )
+
+    def checkpoint(self, account, phase, due_at=0):
+        """Record that a phase finished now; due_at is its own next time, or 0 when its cadence decides."""
+        with self.lock, self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO checkpoints (account, phase, finished_at, due_at) VALUES (?, ?, ?, ?)",
+                (account, phase, time.time(), due_at)
+            )
+
+    def journal(self, account):
+        """Last finish time and own due time (0 when none) of every phase an account completed."""
+        with self.lock:
+            rows = self.db.execute("SELECT phase, finished_at, due_at FROM checkpoints WHERE account = ?", (account,)).fetchall()
+        return {phase: (finished_at, due_at) for phase, finished_at, due_at in rows}
+
+    def rename(self, keys):
+        """Move every item and checkpoint to a new account key, given a {old: new} mapping."""
+        pairs = [(new, old) for old, new in keys.items()]
+        with self.lock, self.db:
+            self.db.executemany("UPDATE OR IGNORE items SET account = ? WHERE account = ?", pairs)
+            self.db.executemany("UPDATE OR IGNORE checkpoints SET account = ? WHERE account = ?", pairs)
+
+class QuerySource:
+    """query.txt streamed line by line, one query per account, with change detection for reloads."""
+
+    def __init__(self, path="query.txt"):
+        self.path = path
+        self.signature = None
+        self.duplicates = 0
+
+    def stat(self):
+        try:
+            info = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return info.st_mtime_ns, info.st_size
+
+    def changed(self):
+        """Whether the file was modified, created or removed since the last load."""
+        return self.stat() != self.signature
+
+    def __iter__(self):
+        with open(self.path, "r") as file:
+            for line in file:
+                line = line.strip()
+                if line:
+                    yield line
+
+    def load(self):
+        """Queries keyed by account; a later line for the same account replaces the earlier one."""
+        self.signature = self.stat()
+        queries = {}
+        lines = 0
+        for query in self:
+            lines += 1
+            queries[account_key(query)] = query
+        self.duplicates = lines - len(queries)
+        return queries
+
+class CatalogCache:
+    """TTL cache of catalog data that is the same for every account (campaigns, task definitions)."""
+
+    def __init__(self, ttl=600, max_entries=64):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.loading = {}
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (value, time.monotonic() + self.ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def get_or_load(self, key, loader):
+        """Return the cached value or load it once, even when several accounts ask at the same time."""
+        value = self.get(key)
+        if value is not None:
+            return value
+        with self.lock:
+            key_lock = self.loading.setdefault(key, threading.Lock())
+        with key_lock:
+            value = self.get(key)
+            if value is None:
+                value = loader()
+                if value is not None:
+                    self.set(key, value)
+        return value
+
+class Metrics:
+    """Request and phase counters exposed in the Prometheus text format."""
+
+    BUCKETS = [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+    STATIC_SEGMENTS = {
+        "auth", "login", "refresh-token", "users", "streak-login", "point-logs", "user-spin-logs",
+        "user-earn-hour", "tasks", "do-task", "basic-tasks", "partner-tasks", "one-time", "campaigns",
+        "user-quest", "list", "user-referral", "boost",
+    }
+
+    def __init__(self, limiter=None):
+        self.limiter = limiter
+        self.lock = threading.Lock()
+        self.requests = {}
+        self.latency = {}
+        self.bytes = {}
+        self.phases = {}
+        self.cycles = self.empty_histogram()
+
+    @classmethod
+    def empty_histogram(cls):
+        return {"buckets": [0] * (len(cls.BUCKETS) + 1), "sum": 0.0, "count": 0}
+
+    @classmethod
+    def endpoint(cls, url):
+        """Path template of a request URL, with IDs replaced by {id}."""
+        path = urlparse(url).path
+        if path.startswith("/v1/"):
+            path = path[3:]
+        segments = [segment if segment in cls.STATIC_SEGMENTS else "{id}" for segment in path.strip("/").split("/")]
+        return "/" + "/".join(segments)
+
+    def observe(self, histogram, value):
+        for index, bound in enumerate(self.BUCKETS):
+            if value <= bound:
+                histogram["buckets"][index] += 1
+                break
+        else:
+            histogram["buckets"][-1] += 1
+        histogram["sum"] += value
+        histogram["count"] += 1
+
+    def record_request(self, method, url, phase, status, seconds, size):
+        endpoint = self.endpoint(url)
+        with self.lock:
+            key = (endpoint, phase, method, str(status))
+            self.requests[key] = self.requests.get(key, 0) + 1
+            histogram = self.latency.setdefault((endpoint, phase), self.empty_histogram())
+            self.observe(histogram, seconds)
+            self.bytes[(endpoint, phase)] = self.bytes.get((endpoint, phase), 0) + size
+
+    def record_phase(self, phase, result):
+        """Count a phase run; result is "success", "failure", "timeout" or "skipped"."""
+        with self.lock:
+            key = (phase, result)
+            self.phases[key] = self.phases.get(key, 0) + 1
+
+    def record_cycle(self, seconds):
+        with self.lock:
+            self.observe(self.cycles, seconds)
+
+    def export(self):
+        """Counters as plain JSON data, so another process can merge them."""
+        with self.lock:
+            return {
+                "requests": [[*key, count] for key, count in self.requests.items()],
+                "latency": [[*key, dict(histogram, buckets=list(histogram["buckets"]))] for key, histogram in self.latency.items()],
+                "bytes": [[*key, size] for key, size in self.bytes.items()],
+                "phases": [[*key, count] for key, count in self.phases.items()],
+                "cycles": dict(self.cycles, buckets=list(self.cycles["buckets"])),
+            }
+
+    def merge(self, data):
+        """Add counters exported by another process to these."""
+        with self.lock:
+            for name in ("requests", "bytes", "phases"):
+                counters = getattr(self, name)
+                for *key, count in data.get(name, []):
+                    counters[tuple(key)] = counters.get(tuple(key), 0) + count
+            histograms = [(self.latency.setdefault(tuple(key), self.empty_histogram()), histogram) for *key, histogram in data.get("latency", [])]
+            if data.get("cycles"):
+                histograms.append((self.cycles, data["cycles"]))
+            for target, histogram in histograms:
+                target["buckets"] = [a + b for a, b in zip(target["buckets"], histogram["buckets"])]
+                target["sum"] += histogram["sum"]
+                target["count"] += histogram["count"]
+
+    @staticmethod
+    def labels(**values):
+        return "{" + ",".join(f'{name}="{value}"' for name, value in values.items()) + "}"
+
+    def histogram_lines(self, name, histogram, **labels):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.BUCKETS + ["+Inf"], histogram["buckets"]):
+            cumulative += count
+            lines.append(f"{name}_bucket{self.labels(**labels, le=bound)} {cumulative}")
+        lines.append(f"{name}_sum{self.labels(**labels)} {histogram['sum']:.6f}")
+        lines.append(f"{name}_count{self.labels(**labels)} {histogram['count']}")
+        return lines
+
+    def render(self):
+        """Current values in the Prometheus text exposition format."""
+        with self.lock:
+            lines = ["# TYPE rewardshq_requests_total counter"]
+            for (endpoint, phase, method, status), count in sorted(self.requests.items()):
+                lines.append(f"rewardshq_requests_total{self.labels(endpoint=endpoint, phase=phase, method=method, status=status)} {count}")
+            lines.append("# TYPE rewardshq_request_duration_seconds histogram")
+            for (endpoint, phase), histogram in sorted(self.latency.items()):
+                lines += self.histogram_lines("rewardshq_request_duration_seconds", histogram, endpoint=endpoint, phase=phase)
+            lines.append("# TYPE rewardshq_response_bytes_total counter")
+            for (endpoint, phase), size in sorted(self.bytes.items()):
+                lines.append(f"rewardshq_response_bytes_total{self.labels(endpoint=endpoint, phase=phase)} {size}")
+            lines.append("# TYPE rewardshq_phase_runs_total counter")
+            for (phase, result), count in sorted(self.phases.items()):
+                lines.append(f"rewardshq_phase_runs_total{self.labels(phase=phase, result=result)} {count}")
+            lines.append("# TYPE rewardshq_account_cycle_seconds histogram")
+            lines += self.histogram_lines("rewardshq_account_cycle_seconds", self.cycles)
+        if self.limiter:
+            lines.append("# TYPE rewardshq_rate_limit_rps gauge")
+            with self.limiter.lock:
+                for host, state in sorted(self.limiter.hosts.items()):
+                    lines.append(f"rewardshq_rate_limit_rps{self.labels(host=host)} {state['rate']:.3f}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self, top=5):
+        """Short text summary of the endpoints that took the most time."""
+        with self.lock:
+            totals = {}
+            for (endpoint, _), histogram in self.latency.items():
+                seconds, count = totals.get(endpoint, (0.0, 0))
+                totals[endpoint] = (seconds + histogram["sum"], count + histogram["count"])
+            throttled = sum(count for key, count in self.requests.items() if key[3] == "429")
+            errors = sum(count for key, count in self.requests.items() if key[3] == "error" or key[3].startswith("5"))
+            total = sum(self.requests.values())
+        lines = [f"Requests: {total}, 429: {throttled}, errors: {errors}"]
+        for endpoint, (seconds, count) in sorted(totals.items(), key=lambda item: -item[1][0])[:top]:
+            lines.append(f"{endpoint}: {count} requests, {seconds:.1f}s total, {seconds / count * 1000:.0f}ms avg")
+        return lines
+
+    def serve(self, port, host="127.0.0.1", render=None):
+        """Expose /metrics on a local HTTP port from a background thread.
+
+        `render` builds the text on each scrape; it defaults to this instance's counters.
+        """
+        render = render or self.render
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                found = self.path.startswith("/metrics")
+                body = render().encode() if found else b""
+                self.send_response(200 if found else 404)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+class Profiler:
+    """Per-phase cProfile stats, tracemalloc allocation sites and a CPU/network/sleep time split.
+
+    Used by --profile, which runs accounts one at a time so the process-wide CPU and
+    allocation numbers of a phase belong to that phase alone.
+    """
+
+    def __init__(self, top=15):
+        self.top = top
+        self.lock = threading.Lock()
+        self.order = []
+        self.stats = {}
+        self.allocations = {}
+        self.times = {}
+        self.current = None
+        self.ignored = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<frozen importlib._bootstrap>")]
+        tracemalloc.start()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Profile the block as one run of a phase."""
+        before = tracemalloc.take_snapshot().filter_traces(self.ignored)
+        times = {"wall": 0.0, "cpu": 0.0, "network": 0.0, "sleep": 0.0}
+        self.current = times
+        profile = cProfile.Profile()
+        wall, cpu = time.perf_counter(), time.process_time()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            times["wall"] = time.perf_counter() - wall
+            times["cpu"] = time.process_time() - cpu
+            self.current = None
+            diff = tracemalloc.take_snapshot().filter_traces(self.ignored).compare_to(before, "lineno")
+            with self.lock:
+                if name not in self.order:
+                    self.order.append(name)
+                    self.times[name] = {"runs": 0, "wall": 0.0, "cpu": 0.0, "network": 0.0, "sleep": 0.0}
+                totals = self.times[name]
+                totals["runs"] += 1
+                for kind, seconds in times.items():
+                    totals[kind] += seconds
+                if name in self.stats:
+                    self.stats[name].add(profile)
+                else:
+                    self.stats[name] = pstats.Stats(profile)
+                sites = self.allocations.setdefault(name, {})
+                for stat in diff:
+                    if stat.size_diff > 0:
+                        frame = stat.traceback[0]
+                        site = sites.setdefault(f"{frame.filename}:{frame.lineno}", [0, 0])
+                        site[0] += stat.size_diff
+                        site[1] += stat.count_diff
+
+    def add(self, kind, seconds):
+        """Charge network wait or deliberate sleep to the phase being profiled."""
+        times = self.current
+        if times is not None and seconds > 0:
+            with self.lock:
+                times[kind] += seconds
+
+    def write(self, path):
+        """Write the text report to `path` and each phase's raw stats next to it as .prof files."""
+        root = os.path.splitext(path)[0]
+        lines = [
+            "Time split per phase (seconds, summed over accounts). CPU includes the work of sending and reading",
+            "requests; network and sleep are summed over concurrent requests, so they can exceed wall time.",
+            f"{'Phase':<14}{'Runs':>6}{'Wall':>10}{'CPU':>10}{'Network':>10}{'Sleep':>10}",
+        ]
+        for name in self.order:
+            t = self.times[name]
+            lines.append(f"{name:<14}{t['runs']:>6}{t['wall']:>10.3f}{t['cpu']:>10.3f}{t['network']:>10.3f}{t['sleep']:>10.3f}")
+
+        for name in self.order:
+            stream = io.StringIO()
+            self.stats[name].stream = stream
+            self.stats[name].sort_stats("tottime").print_stats(self.top)
+            self.stats[name].dump_stats(f"{root}.{name}.prof")
+            lines += ["", f"== {name}: hottest functions ==", stream.getvalue().strip()]
+
+            lines += ["", f"== {name}: allocation sites (bytes still allocated after the phase, new blocks) =="]
+            sites = sorted(self.allocations[name].items(), key=lambda item: -item[1][0])[:self.top]
+            lines += [f"{size:>12} {count:>8}  {site}" for site, (size, count) in sites] or ["(none)"]
+
+        with open(path, "w") as file:
+            file.write("\n".join(lines) + "\n")
+
+class Snapshot:
+    """Account values fetched at login and shared by the phases instead of re-requesting them."""
+
+    def __init__(self):
+        self.spins = None
+        self.point = None
+        self.referral_point = None
+        self.streak = None
+        self.point_bonus = None
+
+def loads(content):
+    """Decode JSON bytes, with orjson when it is installed."""
+    return orjson.loads(content) if orjson else json.loads(content)
+
+def parse_body(response):
+    """Decode a response body once and keep it on the response; non-object bodies become {}."""
+    body = getattr(response, "body", None)
+    if body is None:
+        try:
+            body = loads(response.content) if response.content else {}
+        except ValueError:
+            body = {}
+        if not isinstance(body, dict):
+            body = {}
+        response.body = body
+    return body
+
+def as_dict(value):
+    return value if isinstance(value, dict) else {}
+
+def as_list(value):
+    return value if isinstance(value, list) else []
+
+class Task:
+    """A task or one-time achievement from the task listings."""
+
+    __slots__ = ("id", "name", "completed", "can_claim", "targets")
+
+    def __init__(self, id, name, completed=False, can_claim=False, targets=()):
+        self.id = id
+        self.name = name
+        self.completed = completed
+        self.can_claim = can_claim
+        self.targets = targets
+
+    @classmethod
+    def from_api(cls, data, default_name="Unknown Task"):
+        data = as_dict(data)
+        metadata = as_dict(data.get("metadata"))
+        targets = tuple(
+            streak["target"] for streak in as_list(metadata.get("streak"))
+            if isinstance(streak, dict) and streak.get("target") is not None
+        )
+        return cls(data.get("_id"), metadata.get("name") or default_name, bool(data.get("isCompleted")), bool(data.get("isCanClaim")), targets)
+
+class Quest:
+    """A quest of a campaign, or the quest returned after completing it."""
+
+    __slots__ = ("id", "name", "status", "campaign")
+    DONE_STATUSES = {"completed", "claimed", "done", "finished"}
+
+    def __init__(self, id, name, status, campaign=None):
+        self.id = id
+        self.name = name
+        self.status = status
+        self.campaign = campaign
+
+    @property
+    def done(self):
+        return str(self.status or "").lower() in self.DONE_STATUSES
+
+    @classmethod
+    def from_api(cls, data):
+        data = as_dict(data)
+        campaign = data.get("campaignId") or data.get("campaign")
+        if isinstance(campaign, dict):
+            campaign = campaign.get("_id")
+        return cls(
+            data.get("_id"), data.get("name") or as_dict(data.get("metadata")).get("name"), data.get("status"),
+            campaign if isinstance(campaign, str) else None
+        )
+
+class Campaign:
+    __slots__ = ("id", "title")
+
+    def __init__(self, id, title):
+        self.id = id
+        self.title = title
+
+    @classmethod
+    def from_api(cls, data):
+        data = as_dict(data)
+        return cls(data.get("_id"), data.get("title"))
+
+class Referral:
+    __slots__ = ("id", "name")
+
+    def __init__(self, id, name):
+        self.id = id
+        self.name = name
+
+    @classmethod
+    def from_api(cls, data):
+        data = as_dict(data)
+        user = as_dict(data.get("user"))
+        return cls(data.get("_id"), f"{user.get('firstName', '')} {user.get('lastName', '')}")
+
+class SpinState:
+    """Spins left and, after a spin, its reward."""
+
+    __slots__ = ("spins", "point", "xp", "usdt")
+
+    def __init__(self, spins=None, point=0, xp=0, usdt=0):
+        self.spins = spins
+        self.point = point
+        self.xp = xp
+        self.usdt = usdt
+
+    @classmethod
+    def from_api(cls, data):
+        data = as_dict(data)
+        spins = data.get("numberSpin")
+        return cls(spins if isinstance(spins, int) else None, data.get("point", 0), data.get("xp", 0), data.get("usdt", 0))
+
+class FarmState:
+    """Farming status; next_claim_at is epoch seconds or None when the API gave no time."""
+
+    __slots__ = ("point", "next_claim_at")
+    DUE_KEYS = ["nextClaimAt", "nextClaimTime", "nextTime", "claimAt", "endTime", "endAt"]
+
+    def __init__(self, point=None, next_claim_at=None):
+        self.point = point
+        self.next_claim_at = next_claim_at
+
+    @classmethod
+    def from_api(cls, data):
+        data = as_dict(data)
+        for key in cls.DUE_KEYS:
+            due = parse_timestamp(data.get(key))
+            if due:
+                return cls(data.get("point"), due)
+        return cls(data.get("point"))
+
+def models(cls, items, *args):
+    """Build models from a list of API objects, dropping the ones without an ID."""
+    built = (cls.from_api(item, *args) for item in as_list(items))
+    return [model for model in built if model.id]
+
+def retry_after_seconds(value):
+    """Parse a Retry-After header given either as seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class DeadlineExceeded(requests.exceptions.RequestException):
+    """Raised instead of sending a request once the phase or account budget is spent."""
+
+class RateLimiter:
+    """Adaptive token bucket per host, shared by every account.
+
+    The rate grows a little after each healthy response and is halved on 429/5xx,
+    and a Retry-After header pauses the whole host for the requested time.
+    """
+
+    def __init__(self, rate=5, min_rate=0.5, max_rate=20, increase=0.1):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.lock = threading.Lock()
+        self.hosts = {}
+
+    def state(self, host):
+        if host not in self.hosts:
+            self.hosts[host] = {"rate": self.rate, "tokens": 1.0, "updated": time.monotonic(), "blocked_until": 0.0}
+        return self.hosts[host]
+
+    def acquire(self, host):
+        """Block until the host bucket has a token, returning the time spent waiting."""
+        waited = 0.0
+        while True:
+            with self.lock:
+                state = self.state(host)
+                now = time.monotonic()
+                burst = max(1.0, state["rate"])
+                state["tokens"] = min(burst, state["tokens"] + (now - state["updated"]) * state["rate"])
+                state["updated"] = now
+                if now < state["blocked_until"]:
+                    wait = state["blocked_until"] - now
+                elif state["tokens"] >= 1:
+                    state["tokens"] -= 1
+                    return waited
+                else:
+                    wait = (1 - state["tokens"]) / state["rate"]
+            time.sleep(wait)
+            waited += wait
+
+    def feedback(self, host, status_code, retry_after=None):
+        """Adjust the host rate from the status of a finished request."""
+        with self.lock:
+            state = self.state(host)
+            if status_code == 429 or status_code >= 500:
+                state["rate"] = max(self.min_rate, state["rate"] / 2)
+                state["tokens"] = 0.0
+                if retry_after is not None:
+                    state["blocked_until"] = max(state["blocked_until"], time.monotonic() + retry_after)
+            else:
+                state["rate"] = min(self.max_rate, state["rate"] + self.increase)
+
+class Cassette:
+    """Recorded HTTP exchanges of every account, as JSON lines (gzip when the path ends in .gz).
+
+    Tokens and init data are redacted before anything is written. Replay serves the exchanges
+    of each account in recorded order per method and path, repeating the last one when a run
+    asks for more than was recorded.
+    """
+
+    SECRET_KEYS = {"accessToken", "refreshToken", "telegramInitData", "token"}
+    KEPT_HEADERS = {"content-type", "retry-after"}
+    REPLAY_PREFIX = "replay:"
+
+    def __init__(self, path, mode="record", speed=0):
+        self.path = path
+        self.mode = mode
+        self.speed = speed
+        self.lock = threading.Lock()
+        self.exchanges = {}
+        self.file = None
+        if mode == "record":
+            self.file = self.open("wt")
+            atexit.register(self.file.close)
+        else:
+            with self.open("rt") as file:
+                for line in file:
+                    entry = json.loads(line)
+                    self.exchanges.setdefault((entry["account"], entry["method"], entry["path"]), []).append(entry)
+
+    def open(self, mode):
+        if self.path.endswith(".gz"):
+            return gzip.open(self.path, mode, encoding="utf-8")
+        return open(self.path, mode, encoding="utf-8")
+
+    @classmethod
+    def redact(cls, value):
+        if isinstance(value, dict):
+            return {key: "<redacted>" if key in cls.SECRET_KEYS else cls.redact(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [cls.redact(item) for item in value]
+        return value
+
+    @staticmethod
+    def path_of(url):
+        url = urlparse(url)
+        return f"{url.path}?{url.query}" if url.query else url.path
+
+    def queries(self):
+        """One placeholder query per recorded account, so a replay needs no query.txt."""
+        accounts = sorted({account for account, _, _ in self.exchanges}, key=lambda name: (len(name), name))
+        return [f"{self.REPLAY_PREFIX}{account}" for account in accounts]
+
+    def record(self, account, request, response, seconds):
+        try:
+            body = self.redact(json.loads(response.content)) if response.content else None
+        except ValueError:
+            body = response.text
+        entry = {
+            "account": account,
+            "method": request.method,
+            "path": self.path_of(request.url),
+            "status": response.status_code,
+            "headers": {name: value for name, value in response.headers.items() if name.lower() in self.KEPT_HEADERS},
+            "body": body,
+            "seconds": round(seconds, 4),
+        }
+        line = json.dumps(entry, separators=(",", ":"), ensure_ascii=False)
+        with self.lock:
+            self.file.write(line + "\n")
+            self.file.flush()
+
+    def replay(self, account, request):
+        """Build the recorded response to a request; 404 when nothing like it was recorded."""
+        key = (account, request.method, self.path_of(request.url))
+        with self.lock:
+            entries = self.exchanges.get(key)
+            entry = (entries.pop(0) if len(entries) > 1 else entries[0]) if entries else None
+        if entry is None:
+            entry = {"status": 404, "headers": {"Content-Type": "application/json"}, "body": {"message": "Not in cassette"}, "seconds": 0}
+        if self.speed:
+            time.sleep(entry["seconds"] / self.speed)
+
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        body = entry["body"]
+        response._content = (body if isinstance(body, str) else json.dumps(body)).encode() if body is not None else b""
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        return response
+
+class CassetteAdapter(HTTPAdapter):
+    """Transport adapter that records real exchanges into a cassette or answers from one."""
+
+    def __init__(self, cassette, account, **kwargs):
+        super().__init__(**kwargs)
+        self.cassette = cassette
+        self.account = account
+
+    def send(self, request, *args, **kwargs):
+        if self.cassette.mode == "replay":
+            return self.cassette.replay(self.account, request)
+        started = time.perf_counter()
+        response = super().send(request, *args, **kwargs)
+        self.cassette.record(self.account, request, response, time.perf_counter() - started)
+        return response
+
+class Session(requests.Session):
+    """Keep-alive HTTP session reused for every request of one account."""
+
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+    def __init__(self, headers, pool_size=10, limiter=None, interval=0, max_retries=3, timeout=(10, 30), metrics=None):
+        super().__init__()
+        self.headers.update(headers)
+        self.metrics = metrics
+        self.phase = "login"
+        self.timeout = timeout
+        self.deadline = None
+        self.limiter = limiter
+        self.interval = interval
+        self.max_retries = max_retries
+        self.pace_lock = threading.Lock()
+        self.next_slot = 0.0
+        self.profiler = None
+        self.pool_size = pool_size
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+        self.on_unauthorized = None
+        self.recovering = False
+        self.recover_lock = threading.RLock()
+
+    def request(self, method, url, *args, **kwargs):
+        """Send a request, retrying once with a fresh token after a 401."""
+        sent_with = self.headers.get("Authorization")
+        response = self.send_paced(method, url, *args, **kwargs)
+        if response.status_code == 401 and sent_with and self.on_unauthorized:
+            with self.recover_lock:
+                if self.recovering:
+                    return response
+                if self.headers.get("Authorization") == sent_with:
+                    self.recovering = True
+                    try:
+                        recovered = self.on_unauthorized()
+                    finally:
+                        self.recovering = False
+                else:
+                    recovered = "Authorization" in self.headers
+            if recovered:
+                response = self.send_paced(method, url, *args, **kwargs)
+        return response
+
+    def pace(self):
+        """Keep at least `interval` seconds between requests of this account."""
+        with self.pace_lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+            if self.profiler:
+                self.profiler.add("sleep", slot - now)
+
+    def remaining_timeout(self, timeout):
+        """Clamp the (connect, read) timeout to what is left of the deadline."""
+        if self.deadline is None:
+            return timeout
+        remaining = self.deadline - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceeded("time budget exceeded")
+        connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+        return (min(connect, remaining), min(read, remaining))
+
+    def send_paced(self, method, url, *args, **kwargs):
+        """Send through the account pacing and host rate limiter, retrying 429/5xx responses."""
+        host = urlparse(url).netloc
+        for attempt in range(self.max_retries + 1):
+            self.pace()
+            if self.limiter:
+                waited = self.limiter.acquire(host)
+                if self.profiler:
+                    self.profiler.add("sleep", waited)
+            kwargs["timeout"] = self.remaining_timeout(kwargs.get("timeout", self.timeout))
+            started = time.perf_counter()
+            try:
+                response = super().request(method, url, *args, **kwargs)
+            except requests.exceptions.RequestException:
+                if self.metrics:
+                    self.metrics.record_request(method, url, self.phase, "error", time.perf_counter() - started, 0)
+                if self.profiler:
+                    self.profiler.add("network", time.perf_counter() - started)
+                raise
+            if self.profiler:
+                self.profiler.add("network", time.perf_counter() - started)
+            if self.metrics:
+                self.metrics.record_request(method, url, self.phase, response.status_code, time.perf_counter() - started, len(response.content))
+            retry_after = retry_after_seconds(response.headers.get("Retry-After"))
+            if self.limiter:
+                self.limiter.feedback(host, response.status_code, retry_after)
+            if response.status_code not in self.RETRY_STATUSES or attempt == self.max_retries:
+                return response
+            if retry_after is None:
+                backoff = min(30, 2 ** attempt)
+            else:
+                backoff = 0 if self.limiter else retry_after
+            time.sleep(backoff)
+            if self.profiler:
+                self.profiler.add("sleep", backoff)
+        return response
+
+    def use_cassette(self, cassette, account):
+        """Send every request of this session through a recording or replaying cassette."""
+        adapter = CassetteAdapter(cassette, account, pool_connections=1, pool_maxsize=self.pool_size)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+
+    def set_token(self, token):
+        """Attach the bearer token to every following request."""
+        if token:
+            self.headers["Authorization"] = f"Bearer {token}"
+        else:
+            self.headers.pop("Authorization", None)
 
 class Auth:
     BASE_URL = "https://api-rewardshq.shards.tech/v1"
@@ -15,75 +1106,87 @@ class Auth:
         "Origin": "https://rewardshq.shards.tech",
         "Referer": "https://rewardshq.shards.tech/"
     }
-
-    def __init__(self, query_file="query.txt"):
-        self.query_list = self.load_queries(query_file)
+    PHASES = [
+        ("farming", "auto_farming", "Farming", "start_farming"),
+        ("reff", "auto_reff", "Reff", "reff"),
+        ("spin", "auto_spin", "Spin", "spin"),
+        ("task", "auto_task", "Tasks", "task"),
+        ("campaign", "auto_campaign", "Campaign", "campain"),
+        ("achievements", "auto_achievements", "Achievements", "achievements"),
+    ]
+    REFRESH_PATH = "/auth/refresh-token"
+    DUE_GRACE = 60
+    MAX_DATA_ERRORS = 3
+    MAX_PAGES = 100
+    MAX_QUERY_LENGTH = 1800
+    CAMPAIGN_PAGE_SIZE = 10
+    CAMPAIGN_RECHECK = 86400
+    REFERRAL_PAGE_SIZE = 10
+    PHASE_TIMEOUT = 300
+    TASK_CATEGORIES = [
+        ("Task", "/tasks", "/tasks/do-task/{id}"),
+        ("Basic Task", "/tasks/basic-tasks", "/tasks/basic-tasks/{id}"),
+        ("Partner Task", "/tasks/partner-tasks", "/tasks/partner-tasks/{id}"),
+    ]
+
+    def __init__(self, query, index=0, total=1, tokens=None, store=None, limiter=None, interval=0, timeout=(10, 30), catalog=None, metrics=None):
+        self.query = query
+        self.key = account_key(query)
+        self.index = index
+        self.total = total
+        self.tokens = tokens
+        self.store = store or StateStore(":memory:")
+        self.catalog = catalog or CatalogCache()
         self.token = None
+        self.refresh_token = None
+        self.bootstrapped = False
         self.username = None
-
-    @staticmethod
-    def log(message, color=Fore.RESET):
-        print(Fore.LIGHTBLACK_EX + datetime.now().strftime("[%Y:%m:%d:%H:%M:%S] |") + " " + color + message + Fore.RESET)
-
-    def banner(self):
-        print("     RewardsHQ Free Bot")
-        print("     This Bot Created By LIVEXORDS\n")
-        print("     Channel: t.me/livexordsscript")
-
-    def load_config(self):
-        try:
-            with open('config.json') as config_file:
-                config = json.load(config_file)
-                required_keys = ["auto_farming", "auto_spin", "auto_task", "auto_campaign", "auto_achievements", "delay_iteration", "delay_change_account"]
-                for key in required_keys:
-                    if key not in config:
-                        self.log(f"Missing config key: {key}. Please check your config.json.", Fore.RED)
-                return config
-        except FileNotFoundError:
-            self.log("config.json not found. Please ensure the configuration file is available.", Fore.RED)
-            return {}
-
-
-    def load_queries(self, file_path):
-        """Load queries from a text file."""
-        self.banner()
-        try:
-            with open(file_path, 'r') as file:
-                queries = [line.strip() for line in file if line.strip()]
-            self.log(f"Data Load : {len(queries)}", Fore.GREEN)
-            return queries
-        except FileNotFoundError:
-            self.log("File query.txt not found.", Fore.RED)
-            return []
+        self.metrics = metrics
+        self.session = Session(self.headers, limiter=limiter, interval=interval, timeout=timeout, metrics=metrics)
+        self.session.on_unauthorized = self.refresh_on_unauthorized
+        self.results = {}
+        self.timings = {}
+        self.config = {}
+        self.journal = self.store.journal(self.key)
+        self.due = {}
+        self.aborted = False
+        self.queued = None
+        self.profiler = None
+        self.errors = 0
+        self.task_failures = {}
+        self.snapshot = Snapshot()
+
+    def log(self, message, color=Fore.RESET, level=logging.INFO):
+        """Log a message tagged with the account it belongs to."""
+        name = f" | {self.username}" if self.username else ""
+        log(message, color, level, f"{self.index + 1}/{self.total}{name}")
 
     def user(self):
         """Fetch user information and store username."""
-        headers = {**self.headers, "Authorization": f"Bearer {self.token}"}
-
         try:    
-            response = requests.get(f"{self.BASE_URL}/users", headers=headers)
+            response = self.session.get(f"{self.BASE_URL}/users")
         except requests.exceptions.RequestException as e:
-            self.log(f"Network error occurred: {e}", Fore.RED)
+            self.log(f"Network error occurred: {e}", Fore.RED, logging.ERROR)
             return
 
         if response.status_code == 200:
-            data = response.json().get("data", {})
+            data = as_dict(parse_body(response).get("data"))
             self.username = data.get("firstName", "") + data.get("lastName", "")
         else:
             self.log("Failed to retrieve user data.", Fore.RED)
 
     def streakLogin(self):
         """Fetch user information Streak Login."""
-        headers = {**self.headers, "Authorization": f"Bearer {self.token}"}
-
         try:
-            response = requests.get(f"{self.BASE_URL}/users/streak-login", headers=headers)
+            response = self.session.get(f"{self.BASE_URL}/users/streak-login")
         except requests.exceptions.RequestException as e:
-            self.log(f"Network error occurred: {e}", Fore.RED)
+            self.log(f"Network error occurred: {e}", Fore.RED, logging.ERROR)
             return
 
         if response.status_code == 200:
-            data = response.json().get("data", {})
+            data = as_dict(parse_body(response).get("data"))
+            self.snapshot.streak = data.get("streak", 0)
+            self.snapshot.point_bonus = data.get("pointBonus")
             self.log(f"Streak: {data.get('streak', 0)}", Fore.YELLOW)
             self.log(f"pointBonus: {data.get('pointBonus', 'N/A')}", Fore.YELLOW)
         else:
@@ -91,508 +1194,1243 @@ class Auth:
 
     def point(self):
         """Fetch user information Point user."""
-        headers = {**self.headers, "Authorization": f"Bearer {self.token}"}
-
         try:
-            response = requests.get(f"{self.BASE_URL}/point-logs", headers=headers)
+            response = self.session.get(f"{self.BASE_URL}/point-logs")
         except requests.exceptions.RequestException as e:
-            self.log(f"Network error occurred: {e}", Fore.RED)
+            self.log(f"Network error occurred: {e}", Fore.RED, logging.ERROR)
             return
 
         if response.status_code == 200:
-            data = response.json().get("data", {})
+            data = as_dict(parse_body(response).get("data"))
+            self.snapshot.point = data.get("point", 0)
+            self.snapshot.referral_point = data.get("referralPoint", 0)
             self.log(f"Point: {data.get('point', 0)}", Fore.YELLOW)
             self.log(f"referralPoint: {data.get('referralPoint', 0)}", Fore.YELLOW)
         else:
             self.log("Failed to retrieve Point data.", Fore.RED)
 
     def spinPoint(self):
-        headers = {**self.headers, "Authorization": f"Bearer {self.token}"}
-        response = requests.get(f"{self.BASE_URL}/user-spin-logs", headers=headers)
-        data = response.json().get("data", {})
-        number_of_spins = data.get("numberSpin", 0)
+        """Fetch the number of spins left."""
+        try:
+            response = self.session.get(f"{self.BASE_URL}/user-spin-logs")
+        except requests.exceptions.RequestException as e:
+            self.log(f"Network error occurred: {e}", Fore.RED, logging.ERROR)
+            return
+
+        if response.status_code != 200:
+            self.log(f"Failed to retrieve spin points, status code: {response.status_code}", Fore.RED)
+            return
+        number_of_spins = SpinState.from_api(parse_body(response).get("data")).spins or 0
+        self.snapshot.spins = number_of_spins
         self.log(f"Spin: {number_of_spins}", Fore.GREEN)
 
-    def login(self, index):
-        """Login using a query index and save the access token."""
-        if not (0 <= index < len(self.query_list)):
-            self.log(f"Index {index} out of range.", Fore.RED)
-            return None
+    def bootstrap(self):
+        """Fetch user, spin, point and streak data concurrently into the snapshot.
 
+        Under --profile the lookups run inline, since cProfile only sees the calling thread.
+        """
+        self.snapshot = Snapshot()
+        lookups = [self.user, self.spinPoint, self.point, self.streakLogin]
+        if self.profiler:
+            for lookup in lookups:
+                self.bootstrap_lookup(lookup)
+        else:
+            with ThreadPoolExecutor(max_workers=len(lookups)) as pool:
+                list(pool.map(self.bootstrap_lookup, lookups))
+        self.log(f"Username: {self.username}", Fore.CYAN)
+
+    def bootstrap_lookup(self, lookup):
         try:
-            response = requests.post(
-                f"{self.BASE_URL}/auth/login",
-                headers=self.headers,
-                json={"telegramInitData": self.query_list[index]}
-            )
-        except requests.exceptions.RequestException as e:
-            self.log(f"Network error occurred: {e}", Fore.RED)
-            return
+            lookup()
+        except Exception as e:
+            self.log(f"Bootstrap error: {e}", Fore.RED)
 
+    def login(self):
+        """Authenticate, then fetch the account data once per fresh login."""
+        if not self.authenticate():
+            return
+        if not self.bootstrapped:
+            self.bootstrap()
+            self.bootstrapped = True
+            self.save_tokens({"accessToken": self.token, "refreshToken": self.refresh_token})
+
+    def authenticate(self):
+        """Reuse the cached access token, refresh it when expired, or login with the account query."""
+        if not self.token and self.tokens:
+            cached = self.tokens.get(self.key)
+            if cached:
+                self.token = cached.get("accessToken")
+                self.refresh_token = cached.get("refreshToken")
+                self.username = self.username or cached.get("username")
+
+        if self.token and not token_expired(self.token):
+            self.session.set_token(self.token)
+            self.log("Using cached token.", Fore.GREEN, logging.DEBUG)
+        elif not (self.refresh_token and self.refresh()):
+            self.token = None
+            self.refresh_token = None
+            self.session.set_token(None)
+            try:
+                response = self.session.post(
+                    f"{self.BASE_URL}/auth/login",
+                    json={"telegramInitData": self.query}
+                )
+            except requests.exceptions.RequestException as e:
+                self.log(f"Network error occurred: {e}", Fore.RED, logging.ERROR)
+                return False
 
-        if response.status_code == 201:
-            data = response.json().get("data", {})
-            self.token = data.get("accessToken")
-            refresh_token = data.get("refreshToken")
-            if self.token and refresh_token:
-                self.log("Login successful, token saved.", Fore.GREEN)
-                self.user()
-                self.log(f"Username: {self.username}", Fore.CYAN)
-                self.spinPoint()
-                self.point()
-                self.streakLogin()
-            else:
+            if response.status_code != 201:
+                self.log(f"Query Expired", Fore.RED)
+                return False
+            if not self.save_tokens(as_dict(parse_body(response).get("data"))):
                 self.log("Incomplete token in API response.", Fore.RED)
-        else:
-            self.log(f"Query Expired", Fore.RED)
+                return False
+            self.log("Login successful, token saved.", Fore.GREEN)
+            self.bootstrapped = False
+        return True
+
+    def refresh_on_unauthorized(self):
+        """Recover from a 401 by refreshing the token, falling back to a full login.
+
+        Runs under the session's recover lock, so it only re-authenticates; the
+        account data is fetched again by the next login() once the lock is released.
+        """
+        self.log("Access token rejected, refreshing.", Fore.YELLOW)
+        self.token = None
+        if self.refresh_token and self.refresh():
+            return True
+        if self.tokens:
+            self.tokens.delete(self.key)
+        self.refresh_token = None
+        return self.authenticate()
+
+    def refresh(self):
+        """Exchange the refresh token for a new access token."""
+        self.session.set_token(None)
+        try:
+            response = self.session.post(
+                f"{self.BASE_URL}{self.REFRESH_PATH}",
+                json={"refreshToken": self.refresh_token}
+            )
+        except requests.exceptions.RequestException as e:
+            self.log(f"Network error occurred: {e}", Fore.RED, logging.ERROR)
+            return False
+
+        if response.status_code in (200, 201) and self.save_tokens(as_dict(parse_body(response).get("data"))):
+            self.log("Token refreshed.", Fore.GREEN)
+            return True
+        self.log(f"Token refresh failed, status code: {response.status_code}", Fore.YELLOW)
+        if self.tokens:
+            self.tokens.delete(self.key)
+        return False
+
+    def save_tokens(self, data):
+        """Store a token pair on the session and in the on-disk cache."""
+        token = data.get("accessToken")
+        refresh_token = data.get("refreshToken")
+        if not (token and refresh_token):
+            return False
+        self.token = token
+        self.refresh_token = refresh_token
+        self.session.set_token(token)
+        if self.tokens:
+            self.tokens.set(self.key, {"accessToken": token, "refreshToken": refresh_token, "username": self.username})
+        return True
 
     def start_farming(self):
-        """Initiate farming request if token is present."""
+        """Initiate farming and schedule the next claim; True when the farming status was read."""
         if not self.token:
             self.log("No token available. Please log in first.", Fore.RED)
-            return None
+            return False
         
-        headers = {**self.headers, "Authorization": f"Bearer {self.token}"}
         try:
-            requests.put(f"{self.BASE_URL}/user-earn-hour", headers=headers)
+            self.session.put(f"{self.BASE_URL}/user-earn-hour")
         except requests.exceptions.RequestException as e:
-            self.log(f"Network error occurred: {e}", Fore.RED)
-            return
+            self.log(f"Network error occurred: {e}", Fore.RED, logging.ERROR)
+            return False
         
         try:
-            response = requests.get(f"{self.BASE_URL}/user-earn-hour", headers=headers)
+            response = self.session.get(f"{self.BASE_URL}/user-earn-hour")
         except requests.exceptions.RequestException as e:
-            self.log(f"Network error occurred: {e}", Fore.RED)
-            return
+            self.log(f"Network error occurred: {e}", Fore.RED, logging.ERROR)
+            return False
 
         if response.status_code == 200:
             self.log("Farming request successful.", Fore.GREEN)
-            return response.json()
-        else:
-            self.log(f"Farming failed, status code: {response.status_code}", Fore.RED)
-        return None
+            farm = FarmState.from_api(parse_body(response).get("data"))
+            if farm.next_claim_at and farm.next_claim_at > time.time():
+                self.schedule("farming", farm.next_claim_at - time.time())
+            elif farm.next_claim_at:
+                self.log("Farming claim time is already past, using the phase cadence.", Fore.YELLOW, logging.DEBUG)
+            return True
+        self.log(f"Farming failed, status code: {response.status_code}", Fore.RED)
+        return False
 
     def spin(self):
-        """Perform spin actions in a loop until no spins are available."""
+        """Spend every available spin, tracking the remaining count locally from the PUT results.
+
+        Returns False when the spin count could not be read or spinning stopped on errors.
+        """
         if not self.token:
             self.log("No token available. Please log in first.", Fore.RED)
-            return None
-        
-        headers = {**self.headers, "Authorization": f"Bearer {self.token}"}
-        spin_count = 1 
+            return False
         
-        while True:
-            try:
-                response = requests.get(f"{self.BASE_URL}/user-spin-logs", headers=headers)
-            except requests.exceptions.RequestException as e:
-                self.log(f"Network error occurred: {e}", Fore.RED)
-                return
-
-            data = response.json().get("data", None)
-            if data is None:
-                self.log("Data Erorr, try spin....", Fore.RED)
+        if self.snapshot.spins is None:
+            self.spinPoint()
+        remaining = self.snapshot.spins
+        if remaining is None:
+            self.log("Could not read spin points.", Fore.RED)
+            self.schedule("spin", self.config.get("delay_change_account", 0))
+            return False
+        if remaining == 0:
+            self.log("No spin points remaining.", Fore.RED)
+            return True
+
+        batch = max(1, int(self.config.get("spin_batch", 1)))
+        spin_count = 0
+        failed_rounds = 0
+        while remaining > 0:
+            size = min(batch, remaining)
+            if size == 1:
+                results = [self.spin_once()]
             else:
-                number_of_spins = data.get("numberSpin", 0)
-                
-                if number_of_spins == 0:
-                    self.log("No spin points remaining.", Fore.RED)
+                with ThreadPoolExecutor(max_workers=size) as pool:
+                    results = list(pool.map(lambda _: self.spin_once(), range(size)))
+
+            mismatch = False
+            for state in results:
+                if state is None:
+                    continue
+                spin_count += 1
+                remaining -= 1
+                if state.spins is not None and size == 1 and state.spins != remaining:
+                    mismatch = True
+                self.log(f"Spin {spin_count} successful! Points: {state.point}, XP: {state.xp}, USDT: {state.usdt}, Spins left: {remaining}", Fore.GREEN)
+
+            if None in results or mismatch:
+                failed_rounds = failed_rounds + 1 if None in results else 0
+                if failed_rounds >= self.MAX_DATA_ERRORS:
+                    self.log("Too many spin errors, stopping spin.", Fore.RED)
+                    self.schedule("spin", self.config.get("delay_change_account", 0))
+                    self.snapshot.spins = remaining
                     return False
-                
-                try:
-                    response = requests.put(f"{self.BASE_URL}/user-spin-logs", headers=headers)
-                except requests.exceptions.RequestException as e:
-                    self.log(f"Network error occurred: {e}", Fore.RED)
-                    return
+                self.spinPoint()
+                remaining = self.snapshot.spins or 0
+            else:
+                failed_rounds = 0
 
+        self.snapshot.spins = remaining
+        if remaining == 0:
+            self.log("No spin points remaining.", Fore.RED)
+        return True
 
-                if response.status_code == 200:
-                    data = response.json().get("data", None)
-                    if data is None:
-                        self.log("Data response erorr, try spin....", Fore.RED)
-                    else:
-                        points = data.get("point", 0)
-                        xp = data.get("xp", 0)
-                        usdt = data.get("usdt", 0)
-                        response = requests.get(f"{self.BASE_URL}/user-spin-logs", headers=headers)
-                        updated_data = response.json().get("data", {})
-                        updated_spins = updated_data.get("numberSpin", 0)
-                        self.log(f"Spin {spin_count} successful! Points: {points}, XP: {xp}, USDT: {usdt}, Spins left: {updated_spins}", Fore.GREEN)
-                    spin_count += 1
-                else:
-                    message = data.get("message", "Unknown error")
-                    self.log(f"Spin failed at spin {spin_count}, message: {message}", Fore.RED)
-                    break
+    def spin_once(self):
+        """Spend one spin and return its SpinState, or None when it failed."""
+        try:
+            response = self.session.put(f"{self.BASE_URL}/user-spin-logs")
+        except DeadlineExceeded:
+            raise
+        except requests.exceptions.RequestException as e:
+            self.log(f"Network error occurred: {e}", Fore.RED, logging.ERROR)
+            return None
 
-            time.sleep(5)
+        body = parse_body(response)
+        if response.status_code != 200:
+            self.log(f"Spin failed, message: {body.get('message', 'Unknown error')}", Fore.RED)
+            return None
+        data = body.get("data")
+        if not isinstance(data, dict):
+            self.log("Data response erorr, try spin....", Fore.RED)
+            return None
+        return SpinState.from_api(data)
 
     def task(self):
-        """Claim tasks from both basic-tasks and partner-tasks categories."""
+        """Claim every claimable task of each category in TASK_CATEGORIES.
+
+        Returns False when a task list could not be read or a claim hit a network or server error.
+        """
         if not self.token:
             self.log("No token available. Please log in first.", Fore.RED)
-            return None
-
-        headers = {**self.headers, "Authorization": f"Bearer {self.token}"}
-        task_ids = [] 
+            return False
+
+        task_ids = []
+        completed = self.store.items(self.key, "task")
+        for label, list_path, claim_path in self.TASK_CATEGORIES:
+            self.log(f"Category: {label}", Fore.GREEN, logging.DEBUG)
+            claimable = self.claimable_tasks(label, list_path, completed)
+            if claimable is None:
+                return False
+            if not claimable:
+                continue
+
+            workers = max(1, int(self.config.get("task_concurrency", 3)))
+            if workers == 1:
+                task_ids.extend(task.id for task in claimable if self.claim_task(label, claim_path, task))
+                continue
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                claims = [pool.submit(self.claim_task, label, claim_path, task) for task in claimable]
+                task_ids.extend(task.id for task, claim in zip(claimable, claims) if claim.result())
 
-        # Task Tipe 1: Basic Task
-        # Mengambil task ID dengan GET
-        self.log(f"{Fore.GREEN}Category: Task")
-        try:
-            response = requests.get(f"{self.BASE_URL}/tasks", headers=headers)
-        except requests.exceptions.RequestException as e:
-            self.log(f"Network error occurred: {e}", Fore.RED)
-            return
-
-        if response.status_code != 200:
-            self.log(f"Failed to retrieve basic tasks, status code: {response.status_code}", Fore.RED)
-        else:
-            basic_tasks_data = response.json().get("data", [])
-            for task in basic_tasks_data:
-                task_id = task.get("_id")
-                is_completed = task.get("isCompleted", False)
-                is_can_claim = task.get("isCanClaim", False)
-                task_name = task.get("metadata", {}).get("name", "Unknown Task")
-
-                if not is_completed and is_can_claim:
-                    task_ids.append(task_id)
-                    
-                    try:
-                        do_task_response = requests.post(f"{self.BASE_URL}/tasks/do-task/{task_id}", headers=headers)
-                    except requests.exceptions.RequestException as e:
-                        self.log(f"Network error occurred: {e}", Fore.RED)
-                        return
-
-                    if do_task_response.status_code == 200 or do_task_response.status_code == 201:
-                        self.log(f"Task '{task_name}' successfully claimed.", Fore.GREEN)
-                    else:
-                        self.log(f"Failed to complete task '{task_name}', status code: {do_task_response.status_code}", Fore.RED)
-                else:
-                    self.log(f"Task '{task_name}' is either completed or cannot be claimed.", Fore.YELLOW)
-                
-                time.sleep(5)
+        self.log(f"{len(task_ids)} tasks have been successfully claimed.")
+        retries = [retry_at for _, retry_at in self.task_failures.values() if retry_at > time.time()]
+        if retries:
+            self.schedule("task", min(retries) - time.time())
+        return self.errors == 0
+
+    def claimable_tasks(self, label, list_path, completed):
+        """Fetch one task category and keep only the entries that can be claimed now.
+
+        The IDs seen in each category are shared through the catalog cache, so an account
+        that already finished every known task of a category skips the request entirely.
+        """
+        known = self.catalog.get(f"tasks:{list_path}")
+        if known is not None and known <= completed:
+            return []
 
-        # Task Tipe 2: Basic Task
-        # Mengambil basic task ID dengan GET
-        self.log(f"{Fore.GREEN}Category: Basic Task")
         try:
-            response = requests.get(f"{self.BASE_URL}/tasks/basic-tasks", headers=headers)
+            response = self.session.get(f"{self.BASE_URL}{list_path}")
         except requests.exceptions.RequestException as e:
-            self.log(f"Network error occurred: {e}", Fore.RED)
-            return
+            self.log(f"Network error occurred: {e}", Fore.RED, logging.ERROR)
+            return None
 
         if response.status_code != 200:
-            self.log(f"Failed to retrieve basic tasks, status code: {response.status_code}", Fore.RED)
-        else:
-            partner_tasks_data = response.json().get("data", [])
-            for task in partner_tasks_data:
-                task_id = task.get("_id")
-                is_completed = task.get("isCompleted", False)
-                is_can_claim = task.get("isCanClaim", False)
-                task_name = task.get("metadata", {}).get("name", "Unknown Partner Task")
-
-                if not is_completed and is_can_claim:
-                    task_ids.append(task_id)
-                    
-                    try: 
-                        do_task_response = requests.post(f"{self.BASE_URL}/tasks/basic-tasks/{task_id}", headers=headers)
-                    except requests.exceptions.RequestException as e:
-                        self.log(f"Network error occurred: {e}", Fore.RED)
-                        return
-
-                    if do_task_response.status_code == 200 or do_task_response.status_code == 201:
-                        self.log(f"Basic Task '{task_name}' successfully claimed.", Fore.GREEN)
-                    else:
-                        self.log(f"Failed to complete basic task '{task_name}', status code: {do_task_response.status_code}", Fore.RED)
-                else:
-                    self.log(f"Basic Task '{task_name}' is either completed or cannot be claimed.", Fore.YELLOW)
+            self.log(f"Failed to retrieve {label.lower()}s, status code: {response.status_code}", Fore.RED)
+            return None
 
-                time.sleep(5)
+        tasks = models(Task, parse_body(response).get("data"), f"Unknown {label}")
+        seen = {task.id for task in tasks}
+        if known is None or not seen <= known:
+            self.catalog.set(f"tasks:{list_path}", seen)
+
+        claimable = []
+        for task in tasks:
+            if task.id in completed:
+                continue
+            if task.completed:
+                self.store.add(self.key, "task", task.id)
+                self.task_failures.pop(task.id, None)
+            elif task.id in self.task_failures and self.task_failures[task.id][1] > time.time():
+                self.log(f"{label} '{task.name}' failed before, retrying later.", Fore.YELLOW, logging.DEBUG)
+            elif task.can_claim:
+                claimable.append(task)
+            else:
+                self.log(f"{label} '{task.name}' is either completed or cannot be claimed.", Fore.YELLOW, logging.DEBUG)
+        return claimable
 
-        # Task Tipe 3: Partner Task
-        # Mengambil partner task ID dengan GET
-        self.log(f"{Fore.GREEN}Category: Partner Task")
+    def claim_task(self, label, claim_path, task):
+        """Claim a single task, backing off on that task when the claim fails."""
         try:
-            response = requests.get(f"{self.BASE_URL}/tasks/partner-tasks", headers=headers)
+            response = self.session.post(f"{self.BASE_URL}{claim_path.format(id=task.id)}")
         except requests.exceptions.RequestException as e:
-            self.log(f"Network error occurred: {e}", Fore.RED)
-            return
-
-        if response.status_code != 200:
-            self.log(f"Failed to retrieve partner tasks, status code: {response.status_code}", Fore.RED)
-        else:
-            partner_tasks_data = response.json().get("data", [])
-            for task in partner_tasks_data:
-                task_id = task.get("_id")
-                is_completed = task.get("isCompleted", False)
-                is_can_claim = task.get("isCanClaim", False)
-                task_name = task.get("metadata", {}).get("name", "Unknown Partner Task")
-
-                if not is_completed and is_can_claim:
-                    task_ids.append(task_id)
-
-                    try:
-                        do_task_response = requests.post(f"{self.BASE_URL}/tasks/partner-tasks/{task_id}", headers=headers)
-                    except requests.exceptions.RequestException as e:
-                        self.log(f"Network error occurred: {e}", Fore.RED)
-                        return
-
-                    if do_task_response.status_code == 200 or do_task_response.status_code == 201:
-                        self.log(f"Partner Task '{task_name}' successfully claimed.", Fore.GREEN)
-                    else:
-                        self.log(f"Failed to complete partner task '{task_name}', status code: {do_task_response.status_code}", Fore.RED)
-                else:
-                    self.log(f"Partner Task '{task_name}' is either completed or cannot be claimed.", Fore.YELLOW)
-
-                time.sleep(5)
+            self.log(f"Network error occurred: {e}", Fore.RED, logging.ERROR)
+            self.errors += 1
+            self.back_off_task(task.id)
+            return False
+
+        if response.status_code in (200, 201):
+            self.store.add(self.key, "task", task.id)
+            self.task_failures.pop(task.id, None)
+            self.log(f"{label} '{task.name}' successfully claimed.", Fore.GREEN)
+            return True
+        self.log(f"Failed to complete {label.lower()} '{task.name}', status code: {response.status_code}", Fore.RED)
+        if response.status_code >= 500:
+            self.errors += 1
+        self.back_off_task(task.id)
+        return False
+
+    def back_off_task(self, task_id):
+        """Skip a failed task for delay_change_account seconds, doubling per failure up to the task cadence."""
+        failures = self.task_failures.get(task_id, (0, 0))[0] + 1
+        base = max(self.config.get("delay_change_account", 0), 1)
+        delay = min(base * 2 ** (failures - 1), self.cadence("task"))
+        self.task_failures[task_id] = (failures, time.time() + delay)
 
-        self.log(f"{len(task_ids)} tasks have been successfully claimed.")
-        return task_ids
-    
     def campain(self):
+        """Stream every campaign page and complete the quests that are still open.
+
+        Returns False when a listing or lookup failed, or a quest hit a network or server error.
+        """
         if not self.token:
             self.log("No token available. Please log in first.", Fore.RED)
-            return None
-
-        headers = {**self.headers, "Authorization": f"Bearer {self.token}"}
-
-        payload = {
-            "page": 1,
-            "limit": 10,
-            "keyword": ""
-        }
-
-        try:
-            response = requests.get(f"{self.BASE_URL}/campaigns?page=1&limit=10&keyword=", headers=headers, json=payload)
-        except requests.exceptions.RequestException as e:
-            self.log(f"Network error occurred: {e}", Fore.RED)
+            return False
+
+        recheck = max(self.CAMPAIGN_RECHECK, self.cadence("campaign"))
+        finished_campaigns = self.store.items(self.key, "campaign", since=time.time() - recheck)
+        finished_quests = self.store.items(self.key, "quest")
+        campaign_ids = (campaign.id for campaign in self.iter_campaigns() if campaign.id not in finished_campaigns)
+
+        quest_ids = []
+        for quest in self.iter_open_quests(campaign_ids, finished_quests):
+            quest_ids.append(quest.id)
+            self.log(f"{quest.name} | Status: {quest.status} | ID: {quest.id}", Fore.GREEN, logging.DEBUG)
+            self.complete_quest(quest.id)
+
+        if not quest_ids:
+            self.log("No open quests found.", Fore.YELLOW)
+        return self.errors == 0
+
+    def iter_campaigns(self):
+        """Yield campaigns from the shared catalog, or stream them page by page and fill it."""
+        cached = self.catalog.get("campaigns")
+        if cached is not None:
+            yield from cached
             return
 
-        data = []
+        campaigns = []
+        complete = False
+        for campaign in self.fetch_campaigns():
+            if campaign is None:
+                complete = True
+                break
+            campaigns.append(campaign)
+            yield campaign
+        if complete:
+            self.catalog.set("campaigns", campaigns)
+
+    def fetch_campaigns(self):
+        """Yield campaigns page by page, then None once the listing was read to the end."""
+        seen = set()
+        page = 1
+        while page <= self.MAX_PAGES:
+            try:
+                response = self.session.get(f"{self.BASE_URL}/campaigns?page={page}&limit={self.CAMPAIGN_PAGE_SIZE}&keyword=")
+            except requests.exceptions.RequestException as e:
+                self.log(f"Network error occurred: {e}", Fore.RED, logging.ERROR)
+                self.errors += 1
+                return
 
-        if response.status_code != 200:
-            self.log(f"Failed to retrieve partner tasks, status code: {response.status_code}", Fore.RED)
-            return None
-        else:
-            campaigns = response.json().get("data", [])
-            campaign = campaigns.get("data", [])
-            for campaigns in campaign:
-                _id = campaigns.get("_id")
-                if _id:
-                    data.append(_id) 
-                self.log(f"Title: {campaigns.get('title')}", Fore.GREEN)
-
-        if not data:
-            self.log("No campaigns found.", Fore.YELLOW)
-            return None
+            if response.status_code != 200:
+                self.log(f"Failed to retrieve campaigns, status code: {response.status_code}", Fore.RED)
+                self.errors += 1
+                return
 
-        campaign_ids_query = "&".join([f"campaignIds[]={_id}" for _id in data])
+            listing = as_dict(parse_body(response).get("data"))
+            campaigns = as_list(listing.get("data"))
+            new = [campaign for campaign in models(Campaign, campaigns) if campaign.id not in seen]
+            for campaign in new:
+                seen.add(campaign.id)
+                self.log(f"Title: {campaign.title}", Fore.GREEN, logging.DEBUG)
+                yield campaign
+
+            total = listing.get("total")
+            if not new or len(campaigns) < self.CAMPAIGN_PAGE_SIZE or (isinstance(total, int) and len(seen) >= total):
+                yield None
+                return
+            page += 1
+
+    def batch_ids(self, ids, name):
+        """Group IDs into `name[]=...` query strings no longer than MAX_QUERY_LENGTH."""
+        batch = []
+        length = 0
+        for _id in ids:
+            part = f"{name}[]={_id}"
+            if batch and length + len(part) + 1 > self.MAX_QUERY_LENGTH:
+                yield batch, "&".join(f"{name}[]={item}" for item in batch)
+                batch, length = [], 0
+            batch.append(_id)
+            length += len(part) + 1
+        if batch:
+            yield batch, "&".join(f"{name}[]={item}" for item in batch)
+
+    def iter_open_quests(self, campaign_ids, finished_quests):
+        """Look up quests for campaigns in URL-sized batches and yield the ones not yet done."""
+        for batch, query in self.batch_ids(campaign_ids, "campaignIds"):
+            try:
+                response = self.session.get(f"{self.BASE_URL}/user-quest/list?{query}")
+            except requests.exceptions.RequestException as e:
+                self.log(f"Network error occurred: {e}", Fore.RED, logging.ERROR)
+                self.errors += 1
+                return
+
+            if response.status_code != 200:
+                self.log(f"Failed to retrieve user quests, status code: {response.status_code}", Fore.RED)
+                self.errors += 1
+                return
 
-        user_quest_url = f"{self.BASE_URL}/user-quest/list?{campaign_ids_query}"
+            for campaign_id, quests in self.group_quests(batch, as_list(parse_body(response).get("data"))):
+                open_quests = []
+                for quest in quests:
+                    if quest.id in finished_quests:
+                        continue
+                    if quest.done:
+                        self.store.add(self.key, "quest", quest.id)
+                        finished_quests.add(quest.id)
+                    else:
+                        open_quests.append(quest)
+                if quests and not open_quests and campaign_id is not None:
+                    self.store.add(self.key, "campaign", campaign_id)
+                yield from open_quests
 
+    @staticmethod
+    def group_quests(batch, data):
+        """Pair each requested campaign with its quests.
+
+        Quests are grouped by the campaign id they carry. Only when the payload has no
+        campaign id is a group matched to the request by position; quests that cannot be
+        matched either way are still yielded, under None, so they are completed but never
+        mark a campaign as finished.
+        """
+        requested = set(batch)
+        groups = {}
+        for position, entry in enumerate(data):
+            nested = isinstance(entry, list)
+            for quest in models(Quest, entry if nested else [entry]):
+                campaign_id = quest.campaign
+                if campaign_id is None and nested and position < len(batch):
+                    campaign_id = batch[position]
+                groups.setdefault(campaign_id if campaign_id in requested else None, []).append(quest)
+        return groups.items()
+
+    def complete_quest(self, quest_id):
+        """Send the completion PUT for one quest."""
         try:
-            user_quest_response = requests.get(user_quest_url, headers=headers)
+            response = self.session.put(f"{self.BASE_URL}/user-quest/{quest_id}", json={})
         except requests.exceptions.RequestException as e:
-            self.log(f"Network error occurred: {e}", Fore.RED)
-            return
-
+            self.log(f"Network error occurred: {e}", Fore.RED, logging.ERROR)
+            self.errors += 1
+            return False
 
-        if user_quest_response.status_code != 200:
-            self.log(f"Failed to retrieve user quests, status code: {user_quest_response.status_code}", Fore.RED)
-            return None
-
-        time.sleep(5)
-
-        user_quests = user_quest_response.json()
-        quest_ids = []  
+        quest_title = Quest.from_api(parse_body(response).get("data")).name or "Unknown Title"
 
-        for quest in user_quests.get("data", []):
-            for question in quest:
-                quest_id = question.get("_id")  
-                if quest_id:
-                    quest_ids.append(quest_id)  
-                self.log(f"{question.get('name')} | Status: {question.get('status')} | ID: {quest_id}", Fore.GREEN)
-
-        time.sleep(5)
-        
-        for quest_id in quest_ids:
-            put_url = f"{self.BASE_URL}/user-quest/{quest_id}"
-            put_payload = {}  
+        if response.status_code == 200:
+            self.store.add(self.key, "quest", quest_id)
+            self.log(f"Completed quest: {quest_title}", Fore.GREEN)
+            return True
+        if response.status_code == 404:
+            self.catalog.invalidate("campaigns")
+        if response.status_code >= 500:
+            self.errors += 1
+        self.log(f"Failed to complete quest: {quest_title}", Fore.RED)
+        return False
 
+    def reff(self):
+        """Boost every referral that has not been boosted yet; False when the list or a boost failed."""
+        if not self.token:
+            self.log("No token available. Please log in first.", Fore.RED)
+            return False
+
+        boosted = self.store.items(self.key, "referral")
+        for referral in self.iter_referrals():
+            if referral.id in boosted:
+                continue
+            self.log(f"{referral.name} | ID: {referral.id}", Fore.GREEN, logging.DEBUG)
+            self.boost_referral(referral.id)
+        return self.errors == 0
+
+    def iter_referrals(self):
+        """Yield referrals from every page of the referral list."""
+        page = 1
+        seen = 0
+        while page <= self.MAX_PAGES:
             try:
-                put_response = requests.put(put_url, headers=headers, json=put_payload)
+                response = self.session.get(f"{self.BASE_URL}/user-referral/list?page={page}&limit={self.REFERRAL_PAGE_SIZE}")
             except requests.exceptions.RequestException as e:
-                self.log(f"Network error occurred: {e}", Fore.RED)
+                self.log(f"Network error occurred: {e}", Fore.RED, logging.ERROR)
+                self.errors += 1
                 return
 
-            
-            if put_response.status_code == 200:
-                try:
-                    quest_data = put_response.json().get("data", {})
-                    metadata = quest_data.get("metadata", {})
-                    
-                    quest_title = metadata.get("name", "Unknown Title")  
-                    self.log(f"Completed quest: {quest_title}", Fore.GREEN)
-                    
-                except ValueError:
-                    self.log("Failed to parse response JSON.", Fore.RED)
-            else:
-                try:
-                    quest_data = put_response.json().get("data", {})
-                    metadata = quest_data.get("metadata", {})
-                    
-                    quest_title = metadata.get("name", "Unknown Title")
-                    self.log(f"Failed to complete quest: {quest_title}", Fore.RED)
-                    
-                except ValueError:
-                    self.log("Failed to parse response JSON.", Fore.RED)
+            body = parse_body(response)
+            if not body:
+                self.log(f"Failed to parse referral list, status code: {response.status_code}", Fore.RED)
+                self.errors += 1
+                return
+            if response.status_code != 200:
+                self.log(f"{body.get('message', None)}", Fore.RED)
+                self.errors += 1
+                return
+            if page == 1:
+                self.log(f"{body.get('message', None)}", Fore.GREEN)
 
-            time.sleep(5)
-        return quest_ids 
+            listing = as_dict(body.get("data"))
+            page_items = as_list(listing.get("data"))
+            referrals = models(Referral, page_items)
+            yield from referrals
 
-    def reff(self):
-        if not self.token:
-            self.log("No token available. Please log in first.", Fore.RED)
-            return None
+            seen += len(page_items)
+            total = listing.get("total")
+            if len(page_items) < self.REFERRAL_PAGE_SIZE or (isinstance(total, int) and seen >= total):
+                return
+            page += 1
 
-        headers = {**self.headers, "Authorization": f"Bearer {self.token}"}
-        reffid = []
+    def boost_referral(self, reff_id):
+        """Boost one referral and remember it once the server accepted or already had it."""
+        try:
+            response = self.session.put(f"{self.BASE_URL}/user-referral/boost/{reff_id}", json={})
+        except requests.exceptions.RequestException as e:
+            self.log(f"Network error occurred: {e}", Fore.RED, logging.ERROR)
+            self.errors += 1
+            return False
 
+        message = parse_body(response).get("message") or f"status code: {response.status_code}"
+        if response.status_code == 200:
+            self.store.add(self.key, "referral", reff_id)
+            self.log(f"{message}", Fore.GREEN)
+            return True
+        if self.already_claimed(response.status_code, message):
+            self.store.add(self.key, "referral", reff_id)
+        elif response.status_code >= 500:
+            self.errors += 1
+        self.log(f"{message}", Fore.RED)
+        return False
+
+    def one_time_tasks(self):
+        """Fetch the achievement definitions from /tasks/one-time as Task models."""
         try:
-            response = requests.get(f"{self.BASE_URL}/user-referral/list?page=1&limit=10", headers=headers, json={"page": 1,"limit": 10})
+            response = self.session.get(f"{self.BASE_URL}/tasks/one-time")
         except requests.exceptions.RequestException as e:
-            self.log(f"Network error occurred: {e}", Fore.RED)
-            return
-        
-        if response.status_code != 200:
-            self.log(f"{response.json().get('message', None)}", Fore.RED)
+            self.log(f"Network error occurred: {e}", Fore.RED, logging.ERROR)
             return None
-        else:
-            responreff = response.json()
-        for resreff in responreff.get("data", {}).get("data", []):
-            reff_id = resreff.get("_id", None)
-            if reff_id is None:
-                self.log(f"{response.json().get('message', None)}", Fore.RED)
-            else:
-                reffid.append(reff_id)
-                self.log(f"{response.json().get('message', None)}", Fore.GREEN)
-                first_name = resreff.get("user", {}).get("firstName", "")
-                last_name = resreff.get("user", {}).get("lastName", "")
-                
-                self.log(f"{first_name} {last_name} | ID: {reff_id}", Fore.GREEN)
 
-        time.sleep(5)
-
-        for rffid in reffid:
-            try:
-                response = requests.put(f"{self.BASE_URL}/user-referral/boost/{rffid}", headers=headers, json={})
-            except requests.exceptions.RequestException as e:
-                self.log(f"Network error occurred: {e}", Fore.RED)
-
-            if response.status_code != 200:
-                self.log(f"{response.json().get('message', None)}", Fore.RED)
-            else:
-                self.log(f"{response.json().get('message', None)}", Fore.GREEN)
+        if response.status_code != 200:
+            self.log(f"Failed to retrieve tasks, status code: {response.status_code}", Fore.RED)
+            return None
+        return models(Task, parse_body(response).get("data"), "Unknown Achievement")
 
     def achievements(self):
+        """Claim every achievement target not claimed yet; False when the list or a claim failed."""
         if not self.token:
             self.log("No token available. Please log in first.", Fore.RED)
-            return None
-        
-        headers = {**self.headers, "Authorization": f"Bearer {self.token}"}
-
-        try:
-            response = requests.get(f"{self.BASE_URL}/tasks/one-time", headers=headers)
-        except requests.exceptions.RequestException as e:
-            self.log(f"Network error occurred: {e}", Fore.RED)
-            return
+            return False
 
-        if response.status_code != 200:
-            self.log(f"Failed to retrieve tasks, status code: {response.status_code}", Fore.RED)
-            return
-        
-        data = response.json()
+        tasks = self.catalog.get_or_load("one-time", self.one_time_tasks)
+        if tasks is None:
+            return False
+        claimed = self.store.items(self.key, "achievement")
 
-        for task in data["data"]:
-            task_id = task["_id"]
-            name = task["metadata"]["name"]
+        for task in tasks:
+            task_id = task.id
+            name = task.name
             
-            for streak in task["metadata"]["streak"]:
-                target = streak["target"]
+            for target in task.targets:
+                if f"{task_id}/{target}" in claimed:
+                    continue
                 
                 url = f"{self.BASE_URL}/tasks/one-time/{task_id}/{target}"
                 
                 try:
                     try:
-                        post_response = requests.post(url, headers=headers)
+                        post_response = self.session.post(url)
                     except requests.exceptions.RequestException as e:
-                        self.log(f"Network error occurred: {e}", Fore.RED)
-                        return
+                        self.log(f"Network error occurred: {e}", Fore.RED, logging.ERROR)
+                        return False
 
                     
                     if post_response.status_code == 201:
+                        self.store.add(self.key, "achievement", f"{task_id}/{target}")
                         self.log(f"Successful claim achievement name: {name}, target: {target}", Fore.GREEN)
+                    elif self.already_claimed(post_response.status_code, self.message_of(post_response)):
+                        self.store.add(self.key, "achievement", f"{task_id}/{target}")
+                        self.log(f"Achievement name: {name}, target: {target} already claimed", Fore.YELLOW)
                     else:
+                        if post_response.status_code == 404:
+                            self.catalog.invalidate("one-time")
+                        if post_response.status_code >= 500:
+                            self.errors += 1
                         self.log(f"Failed claim achievemetns name: {name}, target: {target}, status {post_response.status_code}", Fore.RED)
                 except requests.exceptions.RequestException as e:
                     self.log(f"Error claiming achievement {name}, target: {target}: {e}", Fore.RED)
-                
-                time.sleep(5)
+                    self.errors += 1
+        return self.errors == 0
 
-    def run(self):
-        """Main loop to log in and process each query for up to 6 hours."""
-        index = 0
-        config = self.load_config()
+    @staticmethod
+    def already_claimed(status_code, message):
+        """Whether a rejected claim says the reward was already taken."""
+        if status_code not in (400, 409):
+            return False
+        message = str(message or "").lower()
+        return "already" in message or "claimed" in message or "boosted" in message
 
+    @staticmethod
+    def message_of(response):
+        """The message field of a JSON error body, if there is one."""
+        return parse_body(response).get("message")
+
+    def update_query(self, query):
+        """Swap in refreshed init data; tokens and state stay, a failed login is retried right away."""
+        self.query = query
+        if not self.token:
+            self.due = {}
+            self.configure(self.config)
+
+    def configure(self, config):
+        """Apply this account's config and derive each phase's due time from the journal and its cadence."""
+        self.config = config
+        for phase, (finished_at, due_at) in self.journal.items():
+            self.due[phase] = due_at or finished_at + self.cadence(phase)
+
+    def cadence(self, phase):
+        """Seconds between runs of a phase: its phase_cadence entry, else delay_iteration."""
+        cadence = self.config.get("phase_cadence", {}).get(phase)
+        return parse_duration(self.config.get("delay_iteration", 0) if cadence is None else cadence)
+
+    def schedule(self, phase, delay):
+        """Set when a phase of this account should run next."""
+        self.due[phase] = time.time() + max(0, delay)
+
+    def next_due(self):
+        """Earliest due time among the enabled phases, or None when nothing is enabled."""
+        times = [self.due.get(phase, 0) for phase, key, _, _ in self.PHASES if self.config.get(key, False)]
+        return min(times) if times else None
+
+    def process(self, config):
+        """Run the enabled phases that are due for this account and record the outcome."""
+        self.config = config
+        self.results = {}
+        self.timings = {}
+        if self.aborted:
+            self.log("Abandoned by the watchdog before it started, skipped.", Fore.YELLOW)
+            return self.results
+        self.snapshot.spins = None
+        now = time.time() + self.DUE_GRACE
+        due = [phase for phase in self.PHASES if config.get(phase[1], False) and self.due.get(phase[0], 0) <= now]
+        if not due:
+            return self.results
+        for phase, key, label, _ in self.PHASES:
+            if config.get(key, False) and self.due.get(phase, 0) > now:
+                self.log(f"{label}: not due for {self.due[phase] - time.time():.0f} Second", Fore.CYAN, logging.DEBUG)
+
+        account_deadline = time.monotonic() + config.get("account_timeout", 1200)
+        self.session.deadline = account_deadline
+        self.log("Login To User", Fore.RESET)
+        self.session.phase = "login"
+        started = time.monotonic()
+        try:
+            with self.profiled("login"):
+                self.login()
+        except DeadlineExceeded:
+            self.log("Login over time budget.", Fore.RED)
+        self.timings["Login"] = time.monotonic() - started
+        if self.metrics:
+            self.metrics.record_phase("login", "success" if self.token is not None else "failure")
+        if not self.token:
+            self.results["login"] = False
+            self.schedule("login", config.get("delay_iteration", 0))
+            for phase, _, _, _ in due:
+                self.schedule(phase, config.get("delay_iteration", 0))
+            return self.results
+        self.results["login"] = True
+
+        for phase, key, label, method in self.PHASES:
+            if (phase, key, label, method) not in due:
+                continue
+            if self.aborted or time.monotonic() >= account_deadline:
+                self.log(f"{label}: skipped, account over time budget", Fore.YELLOW)
+                self.results[label] = False
+                if self.metrics:
+                    self.metrics.record_phase(phase, "skipped")
+                continue
+            self.log(f"{label}: On", Fore.GREEN)
+            self.due.pop(phase, None)
+            budget = config.get("phase_timeout", {}).get(phase, self.PHASE_TIMEOUT)
+            self.session.deadline = min(account_deadline, time.monotonic() + budget)
+            self.session.phase = phase
+            started = time.monotonic()
+            self.errors = 0
+            try:
+                with self.profiled(phase):
+                    ok = getattr(self, method)()
+                self.results[label] = ok is True and time.monotonic() < self.session.deadline
+            except Exception as e:
+                self.log(f"{label} error: {e}", Fore.RED)
+                self.results[label] = False
+            self.timings[label] = time.monotonic() - started
+            outcome = "success"
+            if not self.results[label]:
+                if time.monotonic() >= self.session.deadline:
+                    outcome = "timeout"
+                    self.log(f"{label}: stopped, time budget exceeded", Fore.YELLOW)
+                else:
+                    outcome = "failure"
+            if self.metrics:
+                self.metrics.record_phase(phase, outcome)
+            timer = self.due.get(phase, 0)
+            if not timer:
+                cadence = self.cadence(phase)
+                if not self.results[label]:
+                    cadence = min(cadence, config.get("delay_iteration", 0))
+                self.schedule(phase, cadence)
+            if outcome == "failure":
+                self.log(f"{label}: failed, retrying within {max(0, int(self.due[phase] - time.time()))} Second", Fore.YELLOW)
+            if self.results[label]:
+                self.store.checkpoint(self.key, phase, timer)
+                self.journal[phase] = (time.time(), timer)
+        self.session.deadline = None
+        return self.results
+
+    def profiled(self, phase):
+        return self.profiler.phase(phase) if self.profiler else contextlib.nullcontext()
+
+    def abort(self):
+        """Make the running phase stop at its next request; used by the watchdog."""
+        self.aborted = True
+        self.session.deadline = time.monotonic()
+
+class Bot:
+    WATCHDOG_GRACE = 30
+    EXIT_CONFIG = 2
+
+    def __init__(self, query_file="query.txt", config=None, shard=None, worker=False, cassette=None, profiler=None):
+        if not worker:
+            self.banner()
+        if config is None:
+            setup_logging({})
+            config = self.load_config()
+        setup_logging(config)
+        self.config = self.checked_config(config)
+        self.shard = shard
+        self.cassette = cassette
+        self.recorded = 0
+        self.profiler = profiler
+        if profiler:
+            self.config = dict(self.config, max_concurrency=1, task_concurrency=1, spin_batch=1, state_db=":memory:")
+        self.source = QuerySource(query_file)
+        if cassette and cassette.mode == "replay":
+            self.config = dict(self.config, state_db=":memory:", query_reload_interval=0)
+            queries = {account_key(query): query for query in cassette.queries()}
+            self.tokens = None
+            self.log(f"Replaying {len(queries)} accounts from {cassette.path}", Fore.CYAN)
+        else:
+            queries = self.load_queries() or {}
+            self.tokens = self.load_tokens()
+        self.store = StateStore(self.config.get("state_db", "state.db"))
+        share = shard[1] if shard and worker else 1
+        self.limiter = RateLimiter(
+            rate=self.config.get("rate_limit", 5) / share,
+            min_rate=self.config.get("rate_limit_min", 0.5) / share,
+            max_rate=self.config.get("rate_limit_max", 20) / share
+        )
+        self.stats_path = shard_path(self.config.get("stats_file", "stats.json"), shard) if shard else None
+        if worker:
+            self.config = dict(self.config, metrics_port=0)
+        self.catalog = CatalogCache(self.config.get("catalog_ttl", 600))
+        self.metrics = Metrics(self.limiter)
+        self.accounts = {}
+        self.busy = set()
+        self.sync_accounts(queries)
+
+    @staticmethod
+    def log(message, color=Fore.RESET, level=logging.INFO):
+        log(message, color, level)
+
+    def banner(self):
+        print("     RewardsHQ Free Bot")
+        print("     This Bot Created By LIVEXORDS\n")
+        print("     Channel: t.me/livexordsscript")
+
+    @classmethod
+    def checked_config(cls, config):
+        """Config with its cadences parsed; exits when one of them is invalid."""
+        try:
+            return parse_cadences(config)
+        except ValueError as e:
+            cls.log(f"Invalid config.json: {e}", Fore.RED, logging.ERROR)
+            raise SystemExit(cls.EXIT_CONFIG)
+
+    @classmethod
+    def load_config(cls):
+        try:
+            with open('config.json') as config_file:
+                config = json.load(config_file)
+                required_keys = ["auto_farming", "auto_spin", "auto_task", "auto_campaign", "auto_achievements", "delay_iteration", "delay_change_account"]
+                for key in required_keys:
+                    if key not in config:
+                        cls.log(f"Missing config key: {key}. Please check your config.json.", Fore.RED, logging.WARNING)
+                return config
+        except FileNotFoundError:
+            cls.log("config.json not found. Please ensure the configuration file is available.", Fore.RED, logging.WARNING)
+            return {}
+
+    def load_queries(self):
+        """Load queries from the query file, one per account; None when the file is missing."""
+        try:
+            queries = self.source.load()
+        except FileNotFoundError:
+            self.log(f"File {self.source.path} not found.", Fore.RED)
+            return None
+        skipped = f" ({self.source.duplicates} duplicates skipped)" if self.source.duplicates else ""
+        if self.shard:
+            index, count = self.shard
+            queries = {key: query for key, query in queries.items() if shard_of(key, count) == index - 1}
+            skipped += f" (shard {index}/{count})"
+        self.log(f"Data Load : {len(queries)}{skipped}", Fore.GREEN)
+        return queries
+
+    def load_tokens(self):
+        """Token cache of this shard, seeded from the shared cache the first time a shard runs."""
+        path = self.config.get("token_cache", "tokens.json")
+        tokens = TokenCache(shard_path(path, self.shard))
+        if self.shard and not tokens.data and os.path.exists(path):
+            shared = TokenCache(path).data
+            tokens.data = {key: value for key, value in shared.items() if shard_of(key, self.shard[1]) == self.shard[0] - 1}
+            if tokens.data:
+                tokens.dirty = True
+                tokens.flush()
+        return tokens
+
+    def write_stats(self):
+        """Write this shard's counters for the supervisor to roll up."""
+        data = self.metrics.export()
+        data["shard"] = f"{self.shard[0]}/{self.shard[1]}"
+        data["accounts"] = len(self.accounts)
+        data["updated_at"] = time.time()
+        temp_path = f"{self.stats_path}.tmp"
+        with open(temp_path, "w") as file:
+            json.dump(data, file)
+        os.replace(temp_path, self.stats_path)
+
+    async def report_stats(self, interval):
         while True:
-            self.log(f"Login To User {index+1}/{len(self.query_list)}")
-            self.login(index)
-            if config["auto_farming"]:
-                self.log("Farming: On", Fore.GREEN)
-                self.start_farming()
-            else:
-                self.log(f"Farming: {Fore.RED}Off", Fore.GREEN)
+            await asyncio.sleep(interval)
+            await asyncio.to_thread(self.write_stats)
 
-            if config["auto_reff"]:
-                self.log("Reff: On", Fore.GREEN)
-                self.reff()
+    async def flush_tokens(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            await asyncio.to_thread(self.tokens.flush)
+
+    def make_account(self, query):
+        auth = Auth(
+            query, tokens=self.tokens, store=self.store, limiter=self.limiter,
+            interval=self.config.get("account_interval", 1),
+            timeout=(self.config.get("timeout_connect", 10), self.config.get("timeout_read", 30)),
+            catalog=self.catalog, metrics=self.metrics
+        )
+        if self.config.get("base_url"):
+            auth.BASE_URL = self.config["base_url"].rstrip("/")
+        auth.configure(self.account_config(query))
+        auth.profiler = auth.session.profiler = self.profiler
+        if self.cassette:
+            if self.cassette.mode == "replay":
+                account = query[len(Cassette.REPLAY_PREFIX):]
+                auth.token = auth.refresh_token = "<redacted>"
             else:
-                self.log(f"Reff: {Fore.RED}Off", Fore.GREEN)
+                self.recorded += 1
+                account = f"account{self.recorded}"
+            auth.session.use_cassette(self.cassette, account)
+        return auth
+
+    def account_config(self, query):
+        """Config of one account: account_overrides entry of its Telegram user id merged over the shared config."""
+        overrides = self.config.get("account_overrides", {}).get(str(telegram_user_id(query)))
+        if not overrides:
+            return self.config
+        config = dict(self.config)
+        for key, value in overrides.items():
+            if isinstance(value, dict) and isinstance(config.get(key), dict):
+                value = {**config[key], **value}
+            config[key] = value
+        return config
+
+    def sync_accounts(self, queries):
+        """Merge a fresh {key: query} map into the running accounts; returns the added, removed and updated keys."""
+        added = [key for key in queries if key not in self.accounts]
+        removed = [key for key in self.accounts if key not in queries]
+        updated = [key for key in queries if key in self.accounts and self.accounts[key].query != queries[key]]
+
+        legacy = {legacy_account_key(queries[key]): key for key in added}
+        legacy = {old: new for old, new in legacy.items() if old != new}
+        if legacy:
+            self.store.rename(legacy)
+            if self.tokens:
+                self.tokens.rename(legacy)
+
+        accounts = {}
+        for key, query in queries.items():
+            auth = self.accounts.get(key) or self.make_account(query)
+            if key in updated:
+                auth.update_query(query)
+            accounts[key] = auth
+        self.accounts = accounts
+        for index, auth in enumerate(self.accounts.values()):
+            auth.index = index
+            auth.total = len(self.accounts)
+        now = time.time()
+        resumed = sum(1 for key in added if any(due > now for due in self.accounts[key].due.values()))
+        if resumed:
+            self.log(f"Resuming: {resumed} accounts already finished some phases this window", Fore.CYAN)
+        return added, removed, updated
+
+    async def watch_queries(self, interval):
+        """Reload the query file when it changes and feed new or refreshed accounts to the dispatcher."""
+        while True:
+            await asyncio.sleep(interval)
+            if not self.source.changed():
+                continue
+            queries = await asyncio.to_thread(self.load_queries)
+            if queries is None:
+                continue
+            added, removed, updated = self.sync_accounts(queries)
+            if added or removed or updated:
+                self.log(f"Query file reloaded: {len(added)} added, {len(removed)} removed, {len(updated)} updated", Fore.CYAN)
+            for key in added + updated:
+                if key not in self.busy:
+                    self.push(self.accounts[key])
+
+    async def run_account(self, auth):
+        """Process the due phases of one account inside a concurrency slot, then reschedule it."""
+        async with self.semaphore:
+            started = time.monotonic()
+            work = asyncio.ensure_future(asyncio.to_thread(auth.process, auth.config))
+            budget = auth.config.get("account_timeout", 1200) + self.WATCHDOG_GRACE
+            try:
+                results = await asyncio.wait_for(asyncio.shield(work), budget)
+            except asyncio.TimeoutError:
+                auth.abort()
+                auth.log(f"Watchdog: account still busy after {budget} Second, moving on", Fore.RED)
+                work.add_done_callback(lambda _: self.push(auth))
+                return {"watchdog": False}
+            except Exception as e:
+                auth.log(f"Unexpected error: {e}", Fore.RED)
+                results = {"login": False}
+                auth.schedule("login", auth.config.get("delay_iteration", 0))
+            if results:
+                self.metrics.record_cycle(time.monotonic() - started)
+            failed = [phase for phase, ok in results.items() if not ok]
+            if failed:
+                auth.log(f"Finished with failures: {', '.join(failed)}", Fore.YELLOW)
+            elif results:
+                auth.log("Finished due phases.", Fore.GREEN)
+            self.push(auth)
+            await asyncio.sleep(self.config.get("delay_change_account", 0))
+            return results
+
+    def push(self, auth):
+        """Queue an account at its next due time and wake the dispatcher."""
+        self.busy.discard(auth.key)
+        auth.aborted = False
+        due = auth.next_due()
+        if due is None or self.accounts.get(auth.key) is not auth:
+            return
+        due = max(due, auth.due.get("login", 0))
+        if due > time.time():
+            auth.log(f"Next due in {due - time.time():.0f} Second", Fore.CYAN, logging.DEBUG)
+        auth.queued = due
+        heapq.heappush(self.queue, (due, auth.key))
+        self.wake.set()
+
+    def setup(self):
+        """Prepare the worker threads, concurrency slots and due queue on the running loop."""
+        concurrency = max(1, int(self.config.get("max_concurrency", 1)))
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=concurrency * 2))
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.wake = asyncio.Event()
+        self.queue = []
+        self.log(f"Running {len(self.accounts)} accounts, {concurrency} at a time", Fore.CYAN)
+
+    async def report_metrics(self, interval):
+        """Log a metrics summary every `interval` seconds."""
+        while True:
+            await asyncio.sleep(interval)
+            for line in self.metrics.summary():
+                self.log(f"[metrics] {line}", Fore.CYAN)
+
+    async def run_cycle(self):
+        """Process every account once, concurrently, and return their results."""
+        self.setup()
+        results = await asyncio.gather(*(self.run_account(auth) for auth in self.accounts.values()))
+        if self.tokens:
+            self.tokens.flush()
+        return results
+
+    async def main(self):
+        """Dispatch accounts from a priority queue keyed on their next due time."""
+        self.setup()
+        for auth in self.accounts.values():
+            auth.queued = 0
+        self.queue = [(0, key) for key in self.accounts]
+        heapq.heapify(self.queue)
+        running = set()
+        if self.config.get("metrics_port"):
+            self.metrics.serve(self.config["metrics_port"])
+            self.log(f"Metrics on http://127.0.0.1:{self.config['metrics_port']}/metrics", Fore.CYAN)
+        if self.config.get("metrics_interval"):
+            running.add(asyncio.create_task(self.report_metrics(self.config["metrics_interval"])))
+        if self.stats_path:
+            running.add(asyncio.create_task(self.report_stats(self.config.get("stats_interval", 60))))
+        if self.tokens:
+            running.add(asyncio.create_task(self.flush_tokens(TokenCache.FLUSH_INTERVAL)))
+        if self.config.get("query_reload_interval", 30):
+            running.add(asyncio.create_task(self.watch_queries(self.config.get("query_reload_interval", 30))))
 
-            if config["auto_spin"]:
-                self.log("Spin: On", Fore.GREEN)
-                self.spin()
-            else:
-                self.log(f"Spin: {Fore.RED}Off", Fore.GREEN)
+        while True:
+            self.wake.clear()
+            if not self.queue:
+                await self.wake.wait()
+                continue
+            due, key = self.queue[0]
+            delay = due - time.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self.wake.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            heapq.heappop(self.queue)
+            auth = self.accounts.get(key)
+            if auth is None or auth.queued != due or key in self.busy:
+                continue
+            self.busy.add(key)
+            task = asyncio.create_task(self.run_account(auth))
+            running.add(task)
+            task.add_done_callback(running.discard)
 
-            if config["auto_task"]:
-                self.log("Tasks: On", Fore.GREEN)
-                self.task()
-            else:
-                self.log(f"Tasks: {Fore.RED}Off", Fore.GREEN)
+    def run(self):
+        """Main loop processing every query."""
+        if not self.accounts:
+            if not self.config.get("query_reload_interval", 30):
+                self.log("No accounts to run and query reload is disabled.", Fore.RED)
+                return
+            self.log(f"No accounts yet, waiting for queries in {self.source.path}", Fore.YELLOW)
+        try:
+            asyncio.run(self.main())
+        finally:
+            if self.tokens:
+                self.tokens.flush()
+            if self.stats_path:
+                self.write_stats()
+
+class Supervisor:
+    """Run one worker process per shard and roll their stats up into one summary."""
+
+    RESTART_DELAY = 10
+
+    def __init__(self, workers, query_file="query.txt", config=None):
+        self.workers = workers
+        self.query_file = query_file
+        if config is None:
+            setup_logging({})
+            config = Bot.load_config()
+        setup_logging(config)
+        self.config = Bot.checked_config(config)
+        self.processes = {}
 
-            if config["auto_campaign"]:
-                self.log("Campaign: On", Fore.GREEN)
-                self.campain()
-            else:
-                self.log(f"Campaign: {Fore.RED}Off", Fore.GREEN)
+    @staticmethod
+    def log(message, color=Fore.RESET, level=logging.INFO):
+        log(message, color, level, "supervisor")
 
-            if config["auto_achievements"]:
-                self.log("Achievements: On", Fore.GREEN)
-                self.achievements()
-            else:
-                self.log(f"Achievements: {Fore.RED}Off", Fore.GREEN)
+    def spawn(self, index):
+        command = [sys.executable, os.path.abspath(__file__), "--shard", f"{index}/{self.workers}", "--worker", "--query", self.query_file]
+        self.processes[index] = subprocess.Popen(command, start_new_session=True)
 
-            index += 1 
-            if index >= len(self.query_list):
-                index = 0  
-                self.log(f"Restarting In {config['delay_iteration']} Second")
-                time.sleep(config["delay_iteration"])
+    def stats_paths(self):
+        path = self.config.get("stats_file", "stats.json")
+        return [shard_path(path, (index, self.workers)) for index in range(1, self.workers + 1)]
 
-            self.log(f"Moving to the next account in {config['delay_change_account']} Second", Fore.CYAN)
-            time.sleep(config["delay_change_account"])
+    @staticmethod
+    def rollup(paths):
+        """Merged counters of every shard stats file that exists, and the per-shard account counts."""
+        metrics = Metrics()
+        shards = {}
+        for path in paths:
+            try:
+                with open(path) as file:
+                    data = json.load(file)
+            except (FileNotFoundError, ValueError):
+                continue
+            metrics.merge(data)
+            shards[data.get("shard", path)] = data.get("accounts", 0)
+        return metrics, shards
+
+    def report(self, paths=None):
+        metrics, shards = self.rollup(paths or self.stats_paths())
+        if not shards:
+            self.log("No shard stats yet.", Fore.YELLOW)
+            return
+        phases = {}
+        for (phase, result), count in metrics.phases.items():
+            counts = phases.setdefault(phase, {"success": 0})
+            counts[result] = counts.get(result, 0) + count
+        self.log(f"Shards reporting: {len(shards)}, accounts: {sum(shards.values())}, account runs: {metrics.cycles['count']}", Fore.CYAN)
+        if phases:
+            self.log("Phases: " + ", ".join(f"{phase} {counts['success']}/{sum(counts.values())}" for phase, counts in sorted(phases.items())), Fore.CYAN)
+        for line in metrics.summary():
+            self.log(line, Fore.CYAN)
 
-            self.log("---------------------------------------")
+    def run(self):
+        """Start the workers, restart any that crash, and report rolled-up stats every metrics_interval.
+
+        SIGTERM shuts the workers down like Ctrl+C; they run in their own sessions and
+        would otherwise outlive the supervisor.
+        """
+        signal.signal(signal.SIGTERM, interrupt)
+        self.log(f"Starting {self.workers} workers", Fore.CYAN)
+        for index in range(1, self.workers + 1):
+            self.spawn(index)
+        if self.config.get("metrics_port"):
+            Metrics().serve(self.config["metrics_port"], render=lambda: self.rollup(self.stats_paths())[0].render())
+            self.log(f"Rolled-up metrics on http://127.0.0.1:{self.config['metrics_port']}/metrics", Fore.CYAN)
+        interval = self.config.get("metrics_interval", 300) or 300
+        last_report = time.monotonic()
+        try:
+            while self.processes:
+                time.sleep(self.RESTART_DELAY)
+                for index, process in list(self.processes.items()):
+                    if process.poll() is None:
+                        continue
+                    if process.returncode == 0:
+                        self.log(f"Worker {index}/{self.workers} has nothing to run, stopped", Fore.YELLOW)
+                        del self.processes[index]
+                    elif process.returncode == Bot.EXIT_CONFIG:
+                        self.log(f"Worker {index}/{self.workers} stopped on an invalid config.json, not restarting", Fore.RED)
+                        del self.processes[index]
+                    else:
+                        self.log(f"Worker {index}/{self.workers} exited with code {process.returncode}, restarting", Fore.RED)
+                        self.spawn(index)
+                if time.monotonic() - last_report >= interval:
+                    self.report()
+                    last_report = time.monotonic()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            signal.signal(signal.SIGTERM, signal.SIG_IGN)
+            for process in self.processes.values():
+                if process.poll() is None:
+                    process.send_signal(signal.SIGTERM)
+            for process in self.processes.values():
+                try:
+                    process.wait(self.RESTART_DELAY)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+            self.report()
+
+def interrupt(signum, frame):
+    """Signal handler that stops the bot the same way Ctrl+C does."""
+    raise KeyboardInterrupt
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="RewardsHQ bot")
+    parser.add_argument("--query", default="query.txt", help="query file, one init data line per account")
+    parser.add_argument("--shard", type=parse_shard, help="only run shard i of N, e.g. 1/4; stable across restarts and hosts")
+    parser.add_argument("--workers", type=int, default=0, help="split the accounts over this many worker processes")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--summary", nargs="+", metavar="STATS_FILE", help="print the rolled-up stats of shard files and exit")
+    parser.add_argument("--record", metavar="CASSETTE", help="record every request and response into a cassette file (.jsonl or .jsonl.gz)")
+    parser.add_argument("--replay", metavar="CASSETTE", help="run one cycle offline against a recorded cassette and exit")
+    parser.add_argument("--replay-speed", type=float, default=0, help="replay at recorded timing (1), faster (e.g. 10), or without delays (0, default)")
+    parser.add_argument("--profile", nargs="?", const="profile.txt", metavar="REPORT", help="run one cycle, one account at a time, and write a per-phase CPU, memory and time report")
+    return parser.parse_args(argv)
 
 if __name__ == "__main__":
-    auth = Auth()
-    auth.run()
+    args = parse_args()
+    if args.summary:
+        Supervisor(len(args.summary), args.query, {}).report(args.summary)
+    elif args.workers > 1:
+        Supervisor(args.workers, args.query).run()
+    elif args.replay or args.profile:
+        cassette = Cassette(args.replay, "replay", args.replay_speed) if args.replay else Cassette(args.record) if args.record else None
+        bot = Bot(args.query, cassette=cassette, profiler=Profiler() if args.profile else None)
+        asyncio.run(bot.run_cycle())
+        for line in bot.metrics.summary():
+            bot.log(line, Fore.CYAN)
+        if args.profile:
+            bot.profiler.write(args.profile)
+            bot.log(f"Profile report written to {args.profile}", Fore.CYAN)
+    else:
+        cassette = Cassette(args.record) if args.record else None
+        bot = Bot(args.query, shard=args.shard, worker=args.worker, cassette=cassette)
+        signal.signal(signal.SIGTERM, interrupt)
+        try:
+            bot.run()
+        except KeyboardInterrupt:
+            pass
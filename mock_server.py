@@ -0,0 +1,264 @@
+import argparse
+import base64
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+class MockState:
+    """In-memory RewardsHQ accounts, created on first login."""
+
+    TASK_PATHS = {"/tasks": "task", "/tasks/basic-tasks": "basic", "/tasks/partner-tasks": "partner"}
+
+    def __init__(self, tasks=10, campaigns=25, quests=2, referrals=13, spins=3, achievements=3, token_ttl=3600):
+        self.tasks = tasks
+        self.campaigns = [{"_id": f"campaign{i}", "title": f"Campaign {i}"} for i in range(campaigns)]
+        self.quests = quests
+        self.referrals = referrals
+        self.spins = spins
+        self.achievements = achievements
+        self.token_ttl = token_ttl
+        self.lock = threading.Lock()
+        self.accounts = {}
+        self.requests = {}
+
+    def account(self, user):
+        with self.lock:
+            if user not in self.accounts:
+                self.accounts[user] = {
+                    "spins": self.spins,
+                    "tasks": {
+                        (kind, f"{kind}{i}"): i % 3 == 0
+                        for kind in self.TASK_PATHS.values() for i in range(self.tasks)
+                    },
+                    "quests": set(),
+                    "boosted": set(),
+                    "claimed": set(),
+                }
+            return self.accounts[user]
+
+    def count(self, user):
+        with self.lock:
+            self.requests[user] = self.requests.get(user, 0) + 1
+
+    def token(self, user, kind):
+        payload = {"sub": user, "kind": kind, "exp": int(time.time()) + self.token_ttl}
+        encoded = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+        return f"mock.{encoded}.signature"
+
+    @staticmethod
+    def token_user(token):
+        try:
+            payload = token.split(".")[1]
+            payload += "=" * (-len(payload) % 4)
+            data = json.loads(base64.urlsafe_b64decode(payload))
+        except (IndexError, ValueError):
+            return None, None
+        if data.get("exp", 0) < time.time():
+            return None, None
+        return data.get("sub"), data.get("kind")
+
+    @staticmethod
+    def init_data_user(init_data):
+        """Telegram user id from the init data, or a hash of the whole line."""
+        params = parse_qs(init_data)
+        try:
+            return str(json.loads(unquote(params["user"][0]))["id"])
+        except (KeyError, IndexError, ValueError, TypeError):
+            return hashlib.sha256(init_data.encode()).hexdigest()[:16]
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    state = None
+    options = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.dispatch("GET")
+
+    def do_POST(self):
+        self.dispatch("POST")
+
+    def do_PUT(self):
+        self.dispatch("PUT")
+
+    def reply(self, status, body, headers=None):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def dispatch(self, method):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        path = url.path[len("/v1"):] if url.path.startswith("/v1") else url.path
+
+        if path == "/__stats":
+            with self.state.lock:
+                return self.reply(200, {"accounts": len(self.state.accounts), "requests": dict(self.state.requests)})
+
+        try:
+            body = json.loads(raw) if raw else {}
+        except ValueError:
+            body = None
+        user = self.request_user(method, path, body)
+        if user is not None:
+            self.state.count(user)
+
+        options = self.options
+        if options.latency or options.jitter:
+            time.sleep(max(0.0, options.latency + random.uniform(-options.jitter, options.jitter)) / 1000)
+        if random.random() < options.rate_429:
+            return self.reply(429, {"message": "Too Many Requests"}, {"Retry-After": str(options.retry_after)})
+        if random.random() < options.error_rate:
+            return self.reply(500, {"message": "Internal Server Error"})
+
+        if body is None:
+            return self.reply(400, {"message": "Invalid JSON"})
+        if user is None:
+            return self.reply(401, {"message": "Unauthorized"})
+        if path in ("/auth/login", "/auth/refresh-token") and method == "POST":
+            return self.reply(201, {"data": {"accessToken": self.state.token(user, "access"), "refreshToken": self.state.token(user, "refresh")}})
+        self.route(method, path, query, self.state.account(user), user)
+
+    def request_user(self, method, path, body):
+        """User a request belongs to: from the login init data, the refresh token or the access token."""
+        if path == "/auth/login" and method == "POST":
+            return self.state.init_data_user((body or {}).get("telegramInitData", ""))
+        if path == "/auth/refresh-token" and method == "POST":
+            user, kind = self.state.token_user((body or {}).get("refreshToken", ""))
+            return user if kind == "refresh" else None
+        user, kind = self.state.token_user(self.headers.get("Authorization", "").replace("Bearer ", ""))
+        return user if kind == "access" else None
+
+    def route(self, method, path, query, account, user):
+        state = self.state
+        if path == "/users" and method == "GET":
+            return self.reply(200, {"data": {"firstName": f"User{user}", "lastName": ""}})
+        if path == "/users/streak-login" and method == "GET":
+            return self.reply(200, {"data": {"streak": 1, "pointBonus": 100}})
+        if path == "/point-logs" and method == "GET":
+            return self.reply(200, {"data": {"point": 1000, "referralPoint": 10}})
+        if path == "/user-earn-hour":
+            next_claim = int(time.time() + 3600) * 1000
+            return self.reply(200, {"data": {"point": 10, "nextClaimAt": next_claim}})
+        if path == "/user-spin-logs":
+            if method == "GET":
+                return self.reply(200, {"data": {"numberSpin": account["spins"]}})
+            with state.lock:
+                if account["spins"] <= 0:
+                    return self.reply(400, {"message": "No spin left"})
+                account["spins"] -= 1
+            return self.reply(200, {"data": {"point": 50, "xp": 5, "usdt": 0}})
+
+        if path in state.TASK_PATHS and method == "GET":
+            kind = state.TASK_PATHS[path]
+            tasks = [
+                {"_id": task_id, "isCompleted": done, "isCanClaim": True, "metadata": {"name": task_id}}
+                for (task_kind, task_id), done in account["tasks"].items() if task_kind == kind
+            ]
+            return self.reply(200, {"data": tasks})
+        match = re.fullmatch(r"/tasks/(do-task|basic-tasks|partner-tasks)/([\w-]+)", path)
+        if match and method == "POST":
+            kind = {"do-task": "task", "basic-tasks": "basic", "partner-tasks": "partner"}[match.group(1)]
+            key = (kind, match.group(2))
+            if key not in account["tasks"]:
+                return self.reply(404, {"message": "Task not found"})
+            if account["tasks"][key]:
+                return self.reply(400, {"message": "Task already claimed"})
+            account["tasks"][key] = True
+            return self.reply(201, {"data": {"_id": match.group(2)}})
+
+        if path == "/campaigns" and method == "GET":
+            page = int(query.get("page", ["1"])[0])
+            limit = int(query.get("limit", ["10"])[0])
+            items = state.campaigns[(page - 1) * limit:page * limit]
+            return self.reply(200, {"data": {"data": items, "total": len(state.campaigns)}})
+        if path == "/user-quest/list" and method == "GET":
+            groups = []
+            for campaign_id in query.get("campaignIds[]", []):
+                groups.append([
+                    {
+                        "_id": f"{campaign_id}-quest{i}",
+                        "name": f"{campaign_id} quest {i}",
+                        "status": "completed" if f"{campaign_id}-quest{i}" in account["quests"] else "pending",
+                    }
+                    for i in range(state.quests)
+                ])
+            return self.reply(200, {"data": groups})
+        match = re.fullmatch(r"/user-quest/([\w-]+)", path)
+        if match and method == "PUT":
+            account["quests"].add(match.group(1))
+            return self.reply(200, {"data": {"metadata": {"name": match.group(1)}}})
+
+        if path == "/user-referral/list" and method == "GET":
+            page = int(query.get("page", ["1"])[0])
+            limit = int(query.get("limit", ["10"])[0])
+            referrals = [
+                {"_id": f"referral{i}", "user": {"firstName": f"Friend{i}", "lastName": ""}}
+                for i in range(state.referrals)
+            ][(page - 1) * limit:page * limit]
+            return self.reply(200, {"message": "Success", "data": {"data": referrals, "total": state.referrals}})
+        match = re.fullmatch(r"/user-referral/boost/([\w-]+)", path)
+        if match and method == "PUT":
+            if match.group(1) in account["boosted"]:
+                return self.reply(400, {"message": "Referral already boosted"})
+            account["boosted"].add(match.group(1))
+            return self.reply(200, {"message": "Boost success"})
+
+        if path == "/tasks/one-time" and method == "GET":
+            tasks = [
+                {"_id": f"achievement{i}", "metadata": {"name": f"Achievement {i}", "streak": [{"target": t} for t in (1, 5, 10)]}}
+                for i in range(state.achievements)
+            ]
+            return self.reply(200, {"data": tasks})
+        match = re.fullmatch(r"/tasks/one-time/([\w-]+)/(\d+)", path)
+        if match and method == "POST":
+            if match.groups() in account["claimed"]:
+                return self.reply(400, {"message": "Achievement already claimed"})
+            account["claimed"].add(match.groups())
+            return self.reply(201, {"data": {}})
+
+        return self.reply(404, {"message": f"Cannot {method} {path}"})
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Local stand-in for the RewardsHQ API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--latency", type=float, default=0, help="base latency per request in ms")
+    parser.add_argument("--jitter", type=float, default=0, help="random +/- latency in ms")
+    parser.add_argument("--error-rate", type=float, default=0, help="fraction of requests answered with 500")
+    parser.add_argument("--rate-429", type=float, default=0, help="fraction of requests answered with 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with 429")
+    parser.add_argument("--token-ttl", type=int, default=3600, help="access token lifetime in seconds")
+    return parser
+
+def serve(options):
+    """Start the mock server in a background thread and return it."""
+    handler = type("Handler", (MockHandler,), {"state": MockState(token_ttl=options.token_ttl), "options": options})
+    server = ThreadingHTTPServer((options.host, options.port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+if __name__ == "__main__":
+    options = build_parser().parse_args()
+    server = serve(options)
+    print(f"Mock RewardsHQ API on http://{options.host}:{server.server_port}/v1", flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()